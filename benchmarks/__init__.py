@@ -0,0 +1,7 @@
+# Description: Benchmark suite comparing the separate chaining and open
+# addressing HashMaps against the built-in dict. Run it with
+#
+#     python -m benchmarks --size 5000 --output results.json
+#
+# Every (map, workload) pair reports ops/sec, p50/p99 latency and peak
+# memory as JSON so results can be diffed between versions.
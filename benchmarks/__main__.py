@@ -0,0 +1,51 @@
+# Description: Command line entry point, see `python -m benchmarks --help`.
+
+import argparse
+import json
+import sys
+
+from hash_functions import HASH_FUNCTIONS
+
+from .runner import run_suite
+from .targets import TARGETS
+from .workloads import WORKLOADS
+
+
+def main(argv: list = None) -> int:
+    """
+    Parses arguments, runs the suite and writes the JSON report
+    """
+    all_workloads = list(WORKLOADS) + ['find_mode']
+
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the HashMap implementations against dict')
+    parser.add_argument('--size', type=int, default=2000,
+                        help='number of keys / operations per workload')
+    parser.add_argument('--maps', nargs='+', choices=list(TARGETS),
+                        default=list(TARGETS))
+    parser.add_argument('--workloads', nargs='+', choices=all_workloads,
+                        default=all_workloads)
+    parser.add_argument('--hash', choices=list(HASH_FUNCTIONS),
+                        default='hash_function_2')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.maps, args.workloads, args.size,
+                       HASH_FUNCTIONS[args.hash], args.seed,
+                       measure_memory=not args.no_memory)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as out:
+            out.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# Description: Times workloads against targets and collects the results as
+# plain dicts ready to be dumped as JSON.
+
+import platform
+import random
+import time
+import tracemalloc
+
+from hashmap_helper import DynamicArray
+
+from .targets import FIND_MODE, TARGETS
+from .workloads import WORKLOADS, find_mode_input
+
+
+def percentile(samples: list, fraction: float) -> int:
+    """
+    Returns the value at the given fraction (0-1) of the sorted samples
+    """
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(fraction * len(ordered)))
+    return ordered[index]
+
+
+def _summarize(target: str, workload: str, latencies: list,
+               peak_memory: int) -> dict:
+    """
+    Builds the result record for one (target, workload) run
+    """
+    total_ns = sum(latencies)
+    return {
+        'map': target,
+        'workload': workload,
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / (total_ns / 1e9) if total_ns else 0.0,
+        'p50_ns': percentile(latencies, 0.50),
+        'p99_ns': percentile(latencies, 0.99),
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def _time_ops(m, ops: list) -> list:
+    """
+    Runs every operation against the map and returns per-op latencies (ns)
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    for name, args in ops:
+        method = getattr(m, name)
+        start = clock()
+        method(*args)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def _peak_memory(run) -> int:
+    """
+    Calls run() under tracemalloc and returns the peak traced bytes
+    """
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_workload(target: str, workload: str, size: int, function,
+                 seed: int = 0, measure_memory: bool = True) -> dict:
+    """
+    Runs one workload against one target
+    Timing and memory come from separate runs with the same seed, since
+    tracemalloc slows every allocation down
+    """
+    make = TARGETS[target]
+
+    def make_map(capacity):
+        return make(capacity, function)
+
+    def build():
+        return WORKLOADS[workload](make_map, size, random.Random(seed))
+
+    m, ops = build()
+    latencies = _time_ops(m, ops)
+    del m, ops
+
+    peak_memory = 0
+    if measure_memory:
+        peak_memory = _peak_memory(lambda: _time_ops(*build()))
+
+    return _summarize(target, workload, latencies, peak_memory)
+
+
+def run_find_mode(target: str, size: int, seed: int = 0, repeat: int = 5,
+                  measure_memory: bool = True) -> dict:
+    """
+    Times the target's find_mode over Zipf-distributed input
+    Each repetition counts as one operation
+    """
+    find_mode = FIND_MODE[target]
+    values = find_mode_input(size, random.Random(seed))
+
+    def make_input():
+        return DynamicArray(values) if target != 'dict' else values
+
+    latencies = []
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter_ns()
+        find_mode(data)
+        latencies.append(time.perf_counter_ns() - start)
+
+    peak_memory = 0
+    if measure_memory:
+        data = make_input()
+        peak_memory = _peak_memory(lambda: find_mode(data))
+
+    return _summarize(target, 'find_mode', latencies, peak_memory)
+
+
+def run_suite(targets: list, workloads: list, size: int, function,
+              seed: int = 0, measure_memory: bool = True) -> dict:
+    """
+    Runs every requested workload against every requested target
+    Returns a dict with run metadata and a list of result records
+    """
+    results = []
+    for workload in workloads:
+        for target in targets:
+            if workload == 'find_mode':
+                if target in FIND_MODE:
+                    results.append(run_find_mode(
+                        target, size, seed, measure_memory=measure_memory))
+                continue
+            results.append(run_workload(target, workload, size, function,
+                                        seed, measure_memory))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'size': size,
+            'seed': seed,
+            'hash_function': function.__name__,
+        },
+        'results': results,
+    }
@@ -0,0 +1,80 @@
+# Description: Map implementations the benchmarks can run against. Each
+# target is built from a starting capacity and a hash function and exposes
+# the HashMap API (put, get, contains_key, remove).
+
+from collections import Counter
+
+import hash_map_cuckoo
+import hash_map_oa
+import hash_map_oa_compact
+import hash_map_sc
+import hash_map_sc_concurrent
+import hash_map_swiss
+
+
+class DictMap:
+    """
+    Built-in dict wrapped in the HashMap API, used as the baseline
+    """
+
+    def __init__(self, capacity: int = 11, function=None) -> None:
+        """Capacity and hash function are ignored; dict manages both."""
+        self._data = {}
+
+    def put(self, key: str, value: object) -> None:
+        self._data[key] = value
+
+    def get(self, key: str) -> object:
+        return self._data.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        return key in self._data
+
+    def remove(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def get_size(self) -> int:
+        return len(self._data)
+
+
+def dict_find_mode(values: list) -> tuple:
+    """
+    Baseline find_mode built on collections.Counter
+    """
+    counts = Counter(values)
+    if not counts:
+        return [], 0
+    max_num = max(counts.values())
+    return [key for key, count in counts.items() if count == max_num], max_num
+
+
+# Target name -> map factory taking (capacity, hash function)
+TARGETS = {
+    'sc': lambda capacity, function: hash_map_sc.HashMap(capacity, function),
+    'sc_mtf': lambda capacity, function: hash_map_sc.HashMap(
+        capacity, function, chain_order='move_to_front'),
+    'sc_transpose': lambda capacity, function: hash_map_sc.HashMap(
+        capacity, function, chain_order='transpose'),
+    'sc_bloom': lambda capacity, function: hash_map_sc.HashMap(
+        capacity, function, bloom='counting'),
+    'sc_concurrent': lambda capacity, function:
+        hash_map_sc_concurrent.HashMap(capacity, function),
+    'oa': lambda capacity, function: hash_map_oa.HashMap(capacity, function),
+    'oa_robin_hood': lambda capacity, function: hash_map_oa.HashMap(
+        capacity, function, probing='robin_hood'),
+    'oa_bloom': lambda capacity, function: hash_map_oa.HashMap(
+        capacity, function, bloom='counting'),
+    'oa_compact': lambda capacity, function: hash_map_oa_compact.HashMap(
+        capacity, function),
+    'swiss': lambda capacity, function: hash_map_swiss.HashMap(
+        capacity, function),
+    'cuckoo': lambda capacity, function: hash_map_cuckoo.HashMap(
+        capacity, function),
+    'dict': DictMap,
+}
+
+# Target name -> find_mode implementation, for targets that have one
+FIND_MODE = {
+    'sc': hash_map_sc.find_mode,
+    'dict': dict_find_mode,
+}
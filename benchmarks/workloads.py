@@ -0,0 +1,138 @@
+# Description: Benchmark workloads. Each workload takes a map factory, the
+# workload size and a seeded random.Random, fills the map (untimed) and
+# returns the map together with the list of (method name, args) operations
+# to time against it.
+
+import itertools
+
+
+def make_keys(count: int, prefix: str = 'str') -> list:
+    """
+    Returns count keys in the sequential 'str' + str(i) style
+    """
+    return [prefix + str(i) for i in range(count)]
+
+
+def zipf_choices(rng, keys: list, count: int, skew: float = 1.1) -> list:
+    """
+    Returns count keys drawn from keys with a Zipf(skew) distribution,
+    so the first keys are by far the most popular
+    """
+    weights = [1 / (rank ** skew) for rank in range(1, len(keys) + 1)]
+    cum_weights = list(itertools.accumulate(weights))
+    return rng.choices(keys, cum_weights=cum_weights, k=count)
+
+
+def _filled(make_map, keys: list, capacity: int = None):
+    """
+    Returns a map presized for keys with every key already inserted
+    """
+    m = make_map(capacity or 2 * len(keys) + 1)
+    for num, key in enumerate(keys):
+        m.put(key, num)
+    return m
+
+
+def uniform_get(make_map, size: int, rng) -> tuple:
+    """
+    Hits only, every key equally likely
+    """
+    keys = make_keys(size)
+    m = _filled(make_map, keys)
+    ops = [('get', (rng.choice(keys),)) for _ in range(size)]
+    return m, ops
+
+
+def zipf_get(make_map, size: int, rng) -> tuple:
+    """
+    Hits only, with a heavily skewed (Zipfian) key popularity
+    """
+    keys = make_keys(size)
+    rng.shuffle(keys)
+    m = _filled(make_map, keys)
+    ops = [('get', (key,)) for key in zipf_choices(rng, keys, size)]
+    return m, ops
+
+
+def zipf_get_loaded(make_map, size: int, rng) -> tuple:
+    """
+    Skewed hits on a map filled as far as it goes before resizing, with
+    the hottest keys inserted first, which leaves them at the far end of
+    their chains
+    """
+    keys = make_keys(size)
+    rng.shuffle(keys)
+    m = _filled(make_map, keys, capacity=size)
+    ops = [('get', (key,)) for key in zipf_choices(rng, keys, size)]
+    return m, ops
+
+
+def ingest(make_map, size: int, rng) -> tuple:
+    """
+    Insert-heavy load into a presized map, so no resize happens
+    """
+    m = make_map(2 * size + 1)
+    ops = [('put', (key, num)) for num, key in enumerate(make_keys(size))]
+    return m, ops
+
+
+def resize_storm(make_map, size: int, rng) -> tuple:
+    """
+    Inserts into a map that starts tiny, so it resizes again and again
+    """
+    m = make_map(1)
+    ops = [('put', (key, num)) for num, key in enumerate(make_keys(size))]
+    return m, ops
+
+
+def delete_churn(make_map, size: int, rng) -> tuple:
+    """
+    Alternates removing a live key with inserting a fresh one, keeping the
+    size steady while tombstones or chain edits pile up
+    """
+    keys = make_keys(size)
+    m = _filled(make_map, keys)
+    fresh = make_keys(size, prefix='new')
+    rng.shuffle(keys)
+
+    ops = []
+    for old_key, new_key in zip(keys, fresh):
+        ops.append(('remove', (old_key,)))
+        ops.append(('put', (new_key, 0)))
+    return m, ops
+
+
+def miss_lookup(make_map, size: int, rng) -> tuple:
+    """
+    Lookups where nine in ten keys are absent
+    """
+    keys = make_keys(size)
+    m = _filled(make_map, keys)
+    missing = make_keys(size, prefix='miss')
+
+    ops = []
+    for _ in range(size):
+        if rng.random() < 0.9:
+            ops.append(('contains_key', (rng.choice(missing),)))
+        else:
+            ops.append(('contains_key', (rng.choice(keys),)))
+    return m, ops
+
+
+# Workload name -> workload function
+WORKLOADS = {
+    'uniform_get': uniform_get,
+    'zipf_get': zipf_get,
+    'zipf_get_loaded': zipf_get_loaded,
+    'ingest': ingest,
+    'resize_storm': resize_storm,
+    'delete_churn': delete_churn,
+    'miss_lookup': miss_lookup,
+}
+
+
+def find_mode_input(size: int, rng) -> list:
+    """
+    Returns size Zipf-distributed values for the find_mode workload
+    """
+    return zipf_choices(rng, make_keys(max(1, size // 10)), size)
@@ -0,0 +1,219 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Blocked Bloom filters the hash maps can keep in front of
+# their table, so a lookup of a key that was never put can stop before
+# probing or walking a chain. Every key sets HASHES_MAX or fewer bits of a
+# single 64-bit word, so testing a key is one word read and one AND.
+#
+# The filters work on the key's hash, which the map computes anyway, and
+# mix it with one multiplication: the top PATTERN_BITS bits of the product
+# pick one of a table of precomputed bit patterns and the bits below them
+# pick the word. Looking the pattern up instead of setting each bit in a
+# loop is what keeps a rejection cheaper than the probe it saves, at the
+# cost of a slightly higher false-positive rate.
+#
+#     standard  bits only; removed keys keep their bits until the map
+#               rebuilds the filter on its next resize
+#     counting  an 8-bit counter per bit as well, so remove clears bits
+#               nothing else needs (a counter that reaches 255 sticks)
+
+from array import array
+from math import log
+
+from hash_functions import MASK64, fmix64
+
+BLOOM_FILTERS = ('standard', 'counting')
+
+HASHES_MAX = 5
+COUNTER_MAX = 255
+
+PATTERN_BITS = 14
+GOLDEN_RATIO_64 = 0x9e3779b97f4a7c15
+
+# Number of bits set -> table of 1 << PATTERN_BITS word masks
+_patterns = {}
+
+
+def _pattern_table(hashes: int) -> array:
+    """
+    Returns the table of word masks with hashes distinct bits set each,
+    building it the first time it is asked for
+    """
+    if hashes not in _patterns:
+        table = array('Q')
+        for pattern in range(1 << PATTERN_BITS):
+            mask = 0
+            mixed = fmix64(pattern)
+            while bin(mask).count('1') < hashes:
+                mask |= 1 << (mixed & 63)
+                mixed >>= 6
+                if not mixed:
+                    mixed = fmix64(pattern + mask)
+            table.append(mask)
+        _patterns[hashes] = table
+    return _patterns[hashes]
+
+
+class BloomFilter:
+    def __init__(self, expected_keys: int, bits_per_key: int = 10) -> None:
+        """
+        Initialize an empty filter with bits_per_key bits for each of
+        expected_keys keys
+        """
+        if bits_per_key < 1:
+            raise ValueError("bits_per_key must be at least 1")
+
+        self._word_count = max(1, -(-expected_keys * bits_per_key // 64))
+        self._words = array('Q', bytes(8 * self._word_count))
+        self._hashes = min(HASHES_MAX, max(1, round(bits_per_key * log(2))))
+        self._patterns = _pattern_table(self._hashes)
+
+        # Lookups the filter answered, and how many of them it rejected
+        # or let through for a key the map then didn't have
+        self.lookups = 0
+        self.rejections = 0
+        self.false_positives = 0
+
+    def _locate(self, hash: int) -> tuple:
+        """
+        Returns (word index, mask of the key's bits in that word)
+        """
+        mixed = ((hash ^ (hash >> 32)) * GOLDEN_RATIO_64) & MASK64
+        return ((mixed >> 18) % self._word_count,
+                self._patterns[mixed >> (64 - PATTERN_BITS)])
+
+    def add(self, hash: int) -> None:
+        """
+        Takes in the hash of a key and records the key
+        """
+        index, mask = self._locate(hash)
+        self._words[index] |= mask
+
+    def remove(self, hash: int) -> None:
+        """
+        Does nothing: a standard filter can't tell which bits other keys
+        still need
+        """
+        return
+
+    def might_contain(self, hash: int) -> bool:
+        """
+        Takes in the hash of a key
+        Returns
+            False - The key was never added (or was removed)
+            True - The key may have been added
+        """
+        self.lookups += 1
+        mixed = ((hash ^ (hash >> 32)) * GOLDEN_RATIO_64) & MASK64
+        mask = self._patterns[mixed >> (64 - PATTERN_BITS)]
+        if self._words[(mixed >> 18) % self._word_count] & mask == mask:
+            return True
+        self.rejections += 1
+        return False
+
+    def record_false_positive(self) -> None:
+        """
+        Counts a key the filter let through that turned out to be absent
+        """
+        self.false_positives += 1
+
+    def reset_stats(self) -> None:
+        """
+        Zeroes the lookup counters
+        """
+        self.lookups = 0
+        self.rejections = 0
+        self.false_positives = 0
+
+    def inherit_stats(self, other: "BloomFilter") -> None:
+        """
+        Takes in the filter this one replaces and carries on its lookup
+        counters, so rebuilding the filter doesn't reset them
+        """
+        self.lookups = other.lookups
+        self.rejections = other.rejections
+        self.false_positives = other.false_positives
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary with the filter's size and fill, its
+        false-positive rate expected from the fill, and the rate it has
+        shown: the share of lookups for absent keys it let through
+        """
+        set_bits = 0
+        expected = 0.0
+        for word in self._words:
+            ones = bin(word).count('1')
+            set_bits += ones
+            expected += (ones / 64) ** self._hashes
+
+        absent = self.rejections + self.false_positives
+        return {
+            'kind': 'counting' if isinstance(self, CountingBloomFilter)
+                    else 'standard',
+            'bits': 64 * self._word_count,
+            'hashes': self._hashes,
+            'fill': set_bits / (64 * self._word_count),
+            'expected_false_positive_rate': expected / self._word_count,
+            'false_positive_rate': (self.false_positives / absent
+                                    if absent else 0.0),
+            'lookups': self.lookups,
+            'rejections': self.rejections,
+            'false_positives': self.false_positives,
+        }
+
+
+class CountingBloomFilter(BloomFilter):
+    """
+    Bloom filter that also counts how many keys set each bit, so keys can
+    be removed
+    """
+
+    def __init__(self, expected_keys: int, bits_per_key: int = 10) -> None:
+        """
+        Initialize an empty filter with bits_per_key bits (and counters)
+        for each of expected_keys keys
+        """
+        super().__init__(expected_keys, bits_per_key)
+        self._counters = bytearray(64 * self._word_count)
+
+    def add(self, hash: int) -> None:
+        """
+        Takes in the hash of a key and records the key
+        """
+        index, mask = self._locate(hash)
+        self._words[index] |= mask
+
+        start = 64 * index
+        while mask:
+            bit = (mask & -mask).bit_length() - 1
+            if self._counters[start + bit] < COUNTER_MAX:
+                self._counters[start + bit] += 1
+            mask &= mask - 1
+
+    def remove(self, hash: int) -> None:
+        """
+        Takes in the hash of a key that was added and forgets it, clearing
+        the bits no other key needs
+        """
+        index, mask = self._locate(hash)
+
+        start = 64 * index
+        while mask:
+            bit = (mask & -mask).bit_length() - 1
+            count = self._counters[start + bit]
+            if 0 < count < COUNTER_MAX:
+                self._counters[start + bit] = count - 1
+                if count == 1:
+                    self._words[index] &= ~(1 << bit)
+            mask &= mask - 1
+
+
+def make_bloom_filter(kind: str, expected_keys: int,
+                      bits_per_key: int = 10) -> BloomFilter:
+    """
+    Returns a new filter of the given kind, one of BLOOM_FILTERS
+    """
+    if kind == 'counting':
+        return CountingBloomFilter(expected_keys, bits_per_key)
+    return BloomFilter(expected_keys, bits_per_key)
@@ -0,0 +1,226 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Collision-quality analyzer for the hash functions. For each
+# hash function and capacity it reports the bucket distribution, a
+# chi-square uniformity test and the expected probe lengths for the
+# separate chaining and open addressing maps.
+#
+#     python hash_analyzer.py --keys 10000 --capacity 20011 40009
+#     python hash_analyzer.py --corpus words.txt --functions fnv1a murmur
+
+import argparse
+import json
+import math
+import sys
+
+from hash_functions import HASH_FUNCTIONS, fmix64
+from hashmap_helper import bump_histogram, prime_at_least
+
+
+def sequential_keys(count: int, prefix: str = 'str') -> list:
+    """
+    Returns count keys in the sequential prefix + str(i) style
+    """
+    return [prefix + str(i) for i in range(count)]
+
+
+def bucket_counts(hashes: list, capacity: int) -> list:
+    """
+    Returns how many hashes land in each bucket of a table of capacity
+    """
+    counts = [0] * capacity
+    for hash in hashes:
+        counts[hash % capacity] += 1
+    return counts
+
+
+def chi_square(counts: list) -> dict:
+    """
+    Chi-square test of the bucket counts against a uniform distribution
+    Returns the statistic, its degrees of freedom and a z-score; |z| well
+    above 3 means the distribution is clearly not uniform
+    """
+    capacity = len(counts)
+    expected = sum(counts) / capacity
+    if expected == 0 or capacity < 2:
+        return {'statistic': 0.0, 'degrees_of_freedom': 0, 'z_score': 0.0}
+
+    statistic = sum((count - expected) ** 2 for count in counts) / expected
+    freedom = capacity - 1
+    return {
+        'statistic': statistic,
+        'degrees_of_freedom': freedom,
+        'z_score': (statistic - freedom) / math.sqrt(2 * freedom),
+    }
+
+
+def chaining_probes(counts: list) -> dict:
+    """
+    Expected nodes examined by the separate chaining map
+    hit: average over stored keys of their position in the chain
+    miss: average chain length of a uniformly random bucket
+    """
+    keys = sum(counts)
+    visited = sum(count * (count + 1) // 2 for count in counts)
+    return {
+        'hit': visited / keys if keys else 0.0,
+        'miss': keys / len(counts),
+    }
+
+
+def _probe(home: int, j: int, capacity: int, triangular: int) -> int:
+    """
+    Returns the slot of probe j from home, stepping by j*j or, in a
+    power-of-two table, by the triangular number (j*j + j) / 2
+    """
+    return (home + ((j * j + triangular * j) >> triangular)) % capacity
+
+
+def quadratic_probes(hashes: list, capacity: int) -> dict:
+    """
+    Simulates quadratic probing (as in hash_map_oa) into a table of
+    capacity without resizing. A power-of-two capacity is simulated the
+    way hash_map_oa runs one: hashes mixed with fmix64 and triangular
+    probing
+    Each probe sequence is cut off after capacity probes, since quadratic
+    probing never reaches some slots of a table whose capacity isn't
+    prime
+    hit: average slots examined to find a stored key
+    miss: average slots examined from a uniformly random home slot until
+    an empty slot is reached (or the sequence is cut off)
+    failed: keys whose probe sequence found no empty slot
+    unreachable: home slots whose probe sequence never reaches an empty
+    slot, so a miss there would examine the whole sequence
+    Returns None when the keys don't fit at a load factor below 0.5
+    """
+    if len(hashes) >= capacity / 2:
+        return None
+
+    triangular = 0
+    if capacity & (capacity - 1) == 0:
+        triangular = 1
+        hashes = [fmix64(hash) for hash in hashes]
+
+    occupied = bytearray(capacity)
+    total = 0
+    stored = 0
+    failed = 0
+    for hash in hashes:
+        index, j = hash % capacity, 1
+        while occupied[index] and j <= capacity:
+            index = _probe(hash % capacity, j, capacity, triangular)
+            j += 1
+        if occupied[index]:
+            failed += 1
+            continue
+        occupied[index] = 1
+        total += j
+        stored += 1
+
+    missing = 0
+    unreachable = 0
+    for home in range(capacity):
+        index, j = home, 1
+        while occupied[index] and j <= capacity:
+            index = _probe(home, j, capacity, triangular)
+            j += 1
+        if occupied[index]:
+            unreachable += 1
+        missing += j
+
+    return {
+        'hit': total / stored if stored else 0.0,
+        'miss': missing / capacity,
+        'failed': failed,
+        'unreachable': unreachable,
+    }
+
+
+def analyze(keys: list, function, capacity: int) -> dict:
+    """
+    Runs every check for one hash function at one capacity
+    """
+    hashes = [function(key) for key in keys]
+    counts = bucket_counts(hashes, capacity)
+
+    distribution = []
+    for count in counts:
+        bump_histogram(distribution, count)
+
+    return {
+        'function': function.__name__,
+        'capacity': capacity,
+        'keys': len(keys),
+        'distinct_hashes': len(set(hashes)),
+        'empty_buckets': distribution[0] if distribution else 0,
+        'largest_bucket': len(distribution) - 1,
+        'bucket_size_histogram': distribution,
+        'chi_square': chi_square(counts),
+        'chaining_probes': chaining_probes(counts),
+        'quadratic_probes': quadratic_probes(hashes, capacity),
+    }
+
+
+def _format_row(result: dict) -> str:
+    """
+    Formats one analysis result as a line of the text report
+    """
+    quadratic = result['quadratic_probes']
+    if quadratic is None:
+        quadratic_text = '      n/a      n/a      n/a'
+    else:
+        quadratic_text = (f"{quadratic['hit']:9.2f}{quadratic['miss']:9.2f}"
+                          f"{quadratic['failed']:9}")
+    return (f"{result['function']:<16}{result['capacity']:>9}"
+            f"{result['distinct_hashes']:>10}{result['empty_buckets']:>9}"
+            f"{result['largest_bucket']:>8}"
+            f"{result['chi_square']['z_score']:>11.1f}"
+            f"{result['chaining_probes']['hit']:9.2f}{quadratic_text}")
+
+
+def main(argv: list = None) -> int:
+    """
+    Parses arguments, analyzes the corpus and prints the report
+    """
+    parser = argparse.ArgumentParser(
+        description='Report bucket distribution, chi-square uniformity and '
+                    'expected probe lengths for each hash function')
+    parser.add_argument('--corpus',
+                        help='file with one key per line (default: '
+                             "sequential 'str' + str(i) keys)")
+    parser.add_argument('--keys', type=int, default=5000,
+                        help='number of sequential keys without --corpus')
+    parser.add_argument('--capacity', type=int, nargs='+',
+                        help='capacities to test (default: the first '
+                             'primes above 2x and 4x keys)')
+    parser.add_argument('--functions', nargs='+', choices=list(HASH_FUNCTIONS),
+                        default=list(HASH_FUNCTIONS))
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable JSON')
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as corpus:
+            keys = [line.rstrip('\n') for line in corpus]
+    else:
+        keys = sequential_keys(args.keys)
+
+    capacities = args.capacity or [prime_at_least(2 * len(keys) + 1),
+                                   prime_at_least(4 * len(keys) + 1)]
+    results = [analyze(keys, HASH_FUNCTIONS[name], capacity)
+               for name in args.functions for capacity in capacities]
+
+    if args.json:
+        sys.stdout.write(json.dumps(results, indent=2) + '\n')
+        return 0
+
+    print(f"{'function':<16}{'capacity':>9}{'distinct':>10}{'empty':>9}"
+          f"{'max':>8}{'chi2 z':>11}{'sc hit':>9}{'oa hit':>9}{'oa miss':>9}"
+          f"{'oa fail':>9}")
+    for result in results:
+        print(_format_row(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
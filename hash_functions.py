@@ -0,0 +1,212 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Well-mixed string hash functions that can be passed to any of
+# the HashMap constructors in place of hash_function_1/hash_function_2,
+# either as the function itself or by its name in HASH_FUNCTIONS. All of
+# them hash the UTF-8 bytes of the key and return an unsigned 64-bit int.
+
+from hashmap_helper import (BATCH_HASH_FUNCTIONS, batch_hash, hash_function_1,
+                            hash_function_2)
+
+MASK64 = (1 << 64) - 1
+
+FNV_OFFSET_BASIS = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+MURMUR_M = 0xc6a4a7935bd1e995
+MURMUR_R = 47
+
+
+def fmix64(hash: int) -> int:
+    """
+    MurmurHash3 64-bit finalizer: scrambles every input bit into every
+    output bit. Useful on its own to repair weak hashes whose low bits
+    are poorly distributed.
+    """
+    hash &= MASK64
+    hash ^= hash >> 33
+    hash = (hash * 0xff51afd7ed558ccd) & MASK64
+    hash ^= hash >> 33
+    hash = (hash * 0xc4ceb9fe1a85ec53) & MASK64
+    hash ^= hash >> 33
+    return hash
+
+
+def fnv1a_hash(key: str) -> int:
+    """64-bit FNV-1a over the UTF-8 bytes of the key"""
+    hash = FNV_OFFSET_BASIS
+    for byte in key.encode('utf-8'):
+        hash ^= byte
+        hash = (hash * FNV_PRIME) & MASK64
+    return hash
+
+
+def murmur_hash(key: str, seed: int = 0) -> int:
+    """
+    MurmurHash64A over the UTF-8 bytes of the key
+    Consumes the key eight bytes at a time, so it is much faster than the
+    byte-at-a-time functions on long keys
+    """
+    data = key.encode('utf-8')
+    length = len(data)
+    hash = (seed ^ (length * MURMUR_M)) & MASK64
+
+    full = length - length % 8
+    for start in range(0, full, 8):
+        block = int.from_bytes(data[start:start + 8], 'little')
+        block = (block * MURMUR_M) & MASK64
+        block ^= block >> MURMUR_R
+        block = (block * MURMUR_M) & MASK64
+
+        hash ^= block
+        hash = (hash * MURMUR_M) & MASK64
+
+    if full != length:
+        hash ^= int.from_bytes(data[full:], 'little')
+        hash = (hash * MURMUR_M) & MASK64
+
+    hash ^= hash >> MURMUR_R
+    hash = (hash * MURMUR_M) & MASK64
+    hash ^= hash >> MURMUR_R
+    return hash
+
+
+def _rotl(value: int, bits: int) -> int:
+    """Rotate a 64-bit value left by bits"""
+    return ((value << bits) | (value >> (64 - bits))) & MASK64
+
+
+def _sip_rounds(v0: int, v1: int, v2: int, v3: int, rounds: int) -> tuple:
+    """Apply rounds SipRounds to the internal state"""
+    for _ in range(rounds):
+        v0 = (v0 + v1) & MASK64
+        v1 = _rotl(v1, 13) ^ v0
+        v0 = _rotl(v0, 32)
+        v2 = (v2 + v3) & MASK64
+        v3 = _rotl(v3, 16) ^ v2
+        v0 = (v0 + v3) & MASK64
+        v3 = _rotl(v3, 21) ^ v0
+        v2 = (v2 + v1) & MASK64
+        v1 = _rotl(v1, 17) ^ v2
+        v2 = _rotl(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash24(secret: bytes, data: bytes) -> int:
+    """
+    SipHash-2-4 of data under a 16-byte secret key
+    """
+    if len(secret) != 16:
+        raise ValueError("SipHash needs a 16-byte key")
+
+    k0 = int.from_bytes(secret[:8], 'little')
+    k1 = int.from_bytes(secret[8:], 'little')
+    v0 = k0 ^ 0x736f6d6570736575
+    v1 = k1 ^ 0x646f72616e646f6d
+    v2 = k0 ^ 0x6c7967656e657261
+    v3 = k1 ^ 0x7465646279746573
+
+    length = len(data)
+    full = length - length % 8
+    for start in range(0, full, 8):
+        block = int.from_bytes(data[start:start + 8], 'little')
+        v3 ^= block
+        v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+        v0 ^= block
+
+    # Last block holds the remaining bytes and the length in its top byte
+    block = ((length & 0xff) << 56) | int.from_bytes(data[full:], 'little')
+    v3 ^= block
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+    v0 ^= block
+
+    v2 ^= 0xff
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def make_siphash(secret: bytes):
+    """
+    Returns a string hash function computing SipHash-2-4 under secret
+    Use a random secret (e.g. os.urandom(16)) to resist hash flooding, but
+    a fixed one if hashes must match across processes
+    """
+    secret = bytes(secret)
+
+    def siphash(key: str) -> int:
+        return siphash24(secret, key.encode('utf-8'))
+
+    siphash.__name__ = 'siphash'
+    return siphash
+
+
+# SipHash with an all-zero key: well mixed and reproducible, but not
+# flooding resistant since the key is public
+siphash = make_siphash(bytes(16))
+
+# Name -> hash function, accepted anywhere a hash function is
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a': fnv1a_hash,
+    'murmur': murmur_hash,
+    'siphash': siphash,
+}
+
+
+def resolve_hash_function(function):
+    """
+    Takes in a hash function or the name of one in HASH_FUNCTIONS
+    Returns:
+        the hash function
+    """
+    if callable(function):
+        return function
+    if function not in HASH_FUNCTIONS:
+        raise ValueError(f"unknown hash function {function!r}, expected "
+                         f"one of {sorted(HASH_FUNCTIONS)}")
+    return HASH_FUNCTIONS[function]
+
+
+def hash_function_name(function) -> str:
+    """
+    Takes in a hash function, possibly wrapped by mixed_hash
+    Returns:
+        its name in HASH_FUNCTIONS, or None if it isn't registered
+    """
+    function = getattr(function, 'unmixed', function)
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+    return None
+
+
+# Hash function -> the same function followed by fmix64, see mixed_hash
+_MIXED_HASH_FUNCTIONS = {}
+
+
+def mixed_hash(function):
+    """
+    Takes in a hash function
+    Returns:
+        a hash function giving fmix64 of the original hash
+    Power-of-two tables index with the low bits of the hash, which the
+    sample hash functions barely vary, so their hashes are mixed first.
+    fmix64 is a bijection on 64-bit values, so distinct hashes stay
+    distinct. The wrapper is created once per function and gets a batch
+    variant registered alongside it
+    """
+    if function in _MIXED_HASH_FUNCTIONS:
+        return _MIXED_HASH_FUNCTIONS[function]
+
+    def mixed(key: str) -> int:
+        return fmix64(function(key))
+
+    def mixed_batch(keys) -> list:
+        return [fmix64(hash) for hash in batch_hash(function, keys)]
+
+    mixed.__name__ = getattr(function, '__name__', 'hash') + '_mixed'
+    mixed.unmixed = function
+    BATCH_HASH_FUNCTIONS[mixed] = mixed_batch
+    _MIXED_HASH_FUNCTIONS[function] = mixed
+    return mixed
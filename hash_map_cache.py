@@ -0,0 +1,302 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Bounded cache on top of the separate chaining HashMap. The
+# map finds a key's CacheNode and the nodes themselves form an intrusive
+# doubly linked list, so get, put and evicting all take O(1) time.
+#
+#     lru  one list in recency order, evicting its least recently used end
+#     lfu  one list per use count, in a list of counts kept in increasing
+#          order; evicts the least recently used key of the lowest count
+
+import sys
+
+from hash_map_sc import HashMap
+from hashmap_helper import hash_function_1
+
+CACHE_POLICIES = ('lru', 'lfu')
+
+
+def default_sizeof(key: str, value: object) -> int:
+    """Shallow size in bytes of a key and its value"""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class CacheNode:
+    """
+    Doubly linked list node holding one cached key
+    """
+
+    def __init__(self, key: str = None, value: object = None,
+                 size: int = 0) -> None:
+        """Initialize a node that isn't linked to anything yet"""
+        self.key = key
+        self.value = value
+        self.size = size
+        self.prev = self
+        self.next = self
+
+        # Frequency list the node is in, used by the lfu policy
+        self.frequency = None
+
+
+class FrequencyNode(CacheNode):
+    """
+    Sentinel of the list of keys that have been used count times, itself
+    a node in the list of use counts
+    """
+
+    def __init__(self, count: int) -> None:
+        """Initialize an empty frequency list"""
+        super().__init__()
+        self.count = count
+        self.lower = self
+        self.higher = self
+
+
+def _unlink(node: CacheNode) -> None:
+    """Removes a node from the list it is in"""
+    node.prev.next = node.next
+    node.next.prev = node.prev
+
+
+def _link_after(sentinel: CacheNode, node: CacheNode) -> None:
+    """Inserts a node right after the sentinel (the most recent end)"""
+    node.prev = sentinel
+    node.next = sentinel.next
+    sentinel.next.prev = node
+    sentinel.next = node
+
+
+class BoundedCache:
+    def __init__(self, max_entries: int = None, max_bytes: int = None,
+                 policy: str = 'lru',
+                 function: callable = hash_function_1,
+                 on_evict=None, sizeof=default_sizeof) -> None:
+        """
+        Initialize a cache holding at most max_entries keys and at most
+        max_bytes bytes of keys and values (either limit may be None, not
+        both)
+        policy is one of CACHE_POLICIES
+        function is the hash function of the underlying HashMap
+        on_evict(key, value) is called for every key the cache evicts
+        sizeof(key, value) gives the bytes a key and its value count for
+        """
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"policy must be one of {CACHE_POLICIES}")
+        if max_entries is None and max_bytes is None:
+            raise ValueError("set max_entries, max_bytes or both")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lfu = policy == 'lfu'
+        self._on_evict = on_evict
+        self._sizeof = sizeof
+
+        self._map = HashMap(max_entries or 11, function)
+        self._bytes = 0
+
+        # lru: recency list. lfu: list of frequency lists, lowest first
+        self._recent = CacheNode()
+        self._counts = FrequencyNode(0)
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_size(self) -> int:
+        """
+        Return the number of cached keys
+        """
+        return self._map.get_size()
+
+    def get_bytes(self) -> int:
+        """
+        Return the bytes counted for the cached keys and values
+        """
+        return self._bytes
+
+    # ------------------------------------------------------------------ #
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Takes in a key and a default
+        Returns
+            Value - At the key, which counts as a use of it
+            default - Key isn't cached
+        """
+        node = self._map.get(key)
+        if node is None:
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        self._touch(node)
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key is cached
+            False - Key isn't cached
+        Doesn't count as a use of the key
+        """
+        return self._map.contains_key(key)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and caches them, then evicts keys until
+        the cache is within its limits again
+        A value too large for max_bytes on its own is evicted right away
+        """
+        size = self._sizeof(key, value)
+        node = self._map.get(key)
+
+        if node is not None:
+            self._bytes += size - node.size
+            node.value = value
+            node.size = size
+            self._touch(node)
+        else:
+            node = CacheNode(key, value, size)
+            self._map.put(key, node)
+            self._bytes += size
+            self._link_new(node)
+
+        self._evict_to_limits()
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key and drops it from the cache if it is cached,
+        without calling on_evict
+        """
+        node = self._map.get(key)
+        if node is not None:
+            self._drop(node)
+
+    def clear(self) -> None:
+        """
+        Drops every key without calling on_evict
+        """
+        self._map.clear()
+        self._bytes = 0
+        self._recent = CacheNode()
+        self._counts = FrequencyNode(0)
+
+    def _link_new(self, node: CacheNode) -> None:
+        """
+        Adds a newly cached node as the most recent one, with a use count
+        of 1 under the lfu policy
+        """
+        if not self._lfu:
+            _link_after(self._recent, node)
+            return
+
+        lowest = self._counts.higher
+        if lowest.count != 1:
+            lowest = self._add_frequency(self._counts, 1)
+        node.frequency = lowest
+        _link_after(lowest, node)
+
+    def _touch(self, node: CacheNode) -> None:
+        """
+        Records a use of a cached node: moves it to the most recent end
+        of its list, or into the list of the next use count under lfu
+        """
+        _unlink(node)
+        if not self._lfu:
+            _link_after(self._recent, node)
+            return
+
+        current = node.frequency
+        higher = current.higher
+        if higher.count != current.count + 1:
+            higher = self._add_frequency(current, current.count + 1)
+        node.frequency = higher
+        _link_after(higher, node)
+        self._discard_if_empty(current)
+
+    @staticmethod
+    def _add_frequency(lower: FrequencyNode, count: int) -> FrequencyNode:
+        """
+        Creates the frequency list for count right above lower
+        """
+        frequency = FrequencyNode(count)
+        frequency.lower = lower
+        frequency.higher = lower.higher
+        lower.higher.lower = frequency
+        lower.higher = frequency
+        return frequency
+
+    def _discard_if_empty(self, frequency: FrequencyNode) -> None:
+        """
+        Removes a frequency list from the list of counts once it is empty
+        """
+        if frequency.next is frequency and frequency is not self._counts:
+            frequency.lower.higher = frequency.higher
+            frequency.higher.lower = frequency.lower
+
+    def _drop(self, node: CacheNode) -> None:
+        """
+        Removes a node from its list and from the map
+        """
+        _unlink(node)
+        if self._lfu:
+            self._discard_if_empty(node.frequency)
+        self._map.remove(node.key)
+        self._bytes -= node.size
+
+    def _victim(self) -> CacheNode:
+        """
+        Returns the node the policy evicts next
+        """
+        if self._lfu:
+            return self._counts.higher.prev
+        return self._recent.prev
+
+    def _over_limits(self) -> bool:
+        """
+        Returns True if the cache holds more than it may
+        """
+        if (self._max_entries is not None
+                and self._map.get_size() > self._max_entries):
+            return True
+        return self._max_bytes is not None and self._bytes > self._max_bytes
+
+    def _evict_to_limits(self) -> None:
+        """
+        Evicts keys until the cache is within its limits
+        """
+        while self._over_limits():
+            node = self._victim()
+            self._drop(node)
+            self._evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(node.key, node.value)
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary of hit, miss and eviction counters together
+        with the hit rate and the current size
+        """
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'size': self._map.get_size(),
+            'bytes': self._bytes,
+            'max_entries': self._max_entries,
+            'max_bytes': self._max_bytes,
+        }
+
+    def reset_stats(self) -> None:
+        """
+        Zeroes the hit, miss and eviction counters
+        """
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
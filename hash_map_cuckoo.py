@@ -0,0 +1,368 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Hash map using bucketized cuckoo hashing. The table is split
+# into buckets of bucket_size slots and every key may only live in one of
+# its `hashes` candidate buckets or in a small stash, so get, contains_key
+# and remove look at no more than hashes * bucket_size + stash_size slots
+# however full the table is.
+#
+# A put that finds all of its candidate buckets full moves a key out of one
+# of them into that key's other buckets, and so on, for at most
+# max_displacements moves. A key still left without a slot goes to the
+# stash, and once the stash is full the table is rebuilt with new hash
+# seeds (and grown, if it is fuller than max_load).
+#
+# The candidate buckets come from double hashing two hash codes of the key:
+# the map's hash function and a seeded murmur_hash, so only two hashes are
+# computed however many candidate buckets there are. Every candidate mixes
+# in the murmur_hash, so keys that collide under a weak hash function such
+# as hash_function_1 still get different buckets.
+
+import random
+
+from hash_functions import MASK64, fmix64, murmur_hash, resolve_hash_function
+from hashmap_helper import DynamicArray, HashEntry, hash_function_1
+
+# Seeds tried for a table of one capacity before it is grown instead
+REBUILD_ATTEMPTS = 3
+
+
+class CuckooEntry(HashEntry):
+    """
+    HashEntry that also caches the seeded second hash of its key
+    """
+
+    def __init__(self, key: str, value: object, hash: int,
+                 alternate: int) -> None:
+        """Initialize an entry with both of its key's hash codes"""
+        super().__init__(key, value, hash)
+        self.alternate = alternate
+
+
+class HashMap:
+    def __init__(self, capacity: int = 11, function=hash_function_1,
+                 hashes: int = 2, bucket_size: int = 4,
+                 stash_size: int = 4, max_displacements: int = 64,
+                 max_load: float = 0.9, seed: int = 1) -> None:
+        """
+        Initialize new HashMap that uses cuckoo hashing for collision
+        resolution, with room for at least capacity keys
+        function may be a hash function or its name in HASH_FUNCTIONS
+        hashes is the number of candidate buckets per key, each holding
+        bucket_size keys
+        The table grows once it is fuller than max_load; seed seeds the
+        second hash and the choice of keys to move
+        """
+        if hashes < 2:
+            raise ValueError("cuckoo hashing needs at least 2 hashes")
+        if bucket_size < 1:
+            raise ValueError("bucket_size must be at least 1")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be in (0, 1)")
+
+        self._hash_function = resolve_hash_function(function)
+        self._hashes = hashes
+        self._bucket_size = bucket_size
+        self._stash_size = stash_size
+        self._max_displacements = max_displacements
+        self._max_load = max_load
+        self._seed = seed
+        self._random = random.Random(seed)
+
+        self._allocate(capacity)
+        self._size = 0
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the table with empty buckets holding at least capacity
+        keys between them, and empties the stash
+        """
+        self._bucket_count = max(1, -(-capacity // self._bucket_size))
+        self._capacity = self._bucket_count * self._bucket_size
+        self._buckets = DynamicArray([None] * self._capacity)
+        self._stash = []
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        for entry in self._stash:
+            out += 'stash: ' + str(entry) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns a float representing the table load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty slots
+        """
+        return self._capacity - self._size + len(self._stash)
+
+    # ------------------------------------------------------------------ #
+
+    def _key_hashes(self, key: str) -> tuple:
+        """
+        Returns the two hash codes of the key: the map's hash function and
+        the seeded murmur_hash
+        """
+        return (self._hash_function(key) & MASK64,
+                murmur_hash(key, self._seed) | 1)
+
+    def _candidates(self, hash: int, alternate: int) -> list:
+        """
+        Returns the starting slot of each candidate bucket of a key
+        """
+        return [(fmix64(hash + way * alternate) % self._bucket_count)
+                * self._bucket_size for way in range(1, self._hashes + 1)]
+
+    def _find(self, key: str, hash: int, alternate: int) -> int:
+        """
+        Takes in a key and its hash codes
+        Returns
+            Int - Slot index of the key, or -(stash index + 2) if the key
+            is in the stash
+            -1 - Key doesn't exist
+        """
+        for start in self._candidates(hash, alternate):
+            for index in range(start, start + self._bucket_size):
+                entry = self._buckets[index]
+                if (entry is not None and entry.hash == hash
+                        and entry.key == key):
+                    return index
+
+        for index in range(len(self._stash)):
+            entry = self._stash[index]
+            if entry.hash == hash and entry.key == key:
+                return -(index + 2)
+        return -1
+
+    def _entry(self, key: str) -> CuckooEntry:
+        """
+        Returns the key's entry, or None if it doesn't exist
+        """
+        index = self._find(key, *self._key_hashes(key))
+        if index == -1:
+            return None
+        if index < -1:
+            return self._stash[-index - 2]
+        return self._buckets[index]
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        entry = self._entry(key)
+        return None if entry is None else entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        return self._entry(key) is not None
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and places it in the hash map
+        """
+        hash, alternate = self._key_hashes(key)
+        index = self._find(key, hash, alternate)
+        if index >= 0:
+            self._buckets[index].value = value
+            return
+        if index < -1:
+            self._stash[-index - 2].value = value
+            return
+
+        entry = CuckooEntry(key, value, hash, alternate)
+        self._size += 1
+        if self._size > self._capacity * self._max_load:
+            self._rebuild(self._capacity * 2, [entry])
+            return
+
+        homeless = self._insert(entry)
+        if homeless is not None:
+            self._rebuild(self._capacity, [homeless])
+
+    def _free_slot(self, entry: CuckooEntry) -> int:
+        """
+        Returns an empty slot in one of the entry's candidate buckets, or
+        -1 if they are all full
+        """
+        for start in self._candidates(entry.hash, entry.alternate):
+            for index in range(start, start + self._bucket_size):
+                if self._buckets[index] is None:
+                    return index
+        return -1
+
+    def _insert(self, entry: CuckooEntry) -> CuckooEntry:
+        """
+        Places an entry whose key is absent, moving other keys out of the
+        way or into the stash as needed
+        Returns
+            None - Every key has a slot
+            CuckooEntry - The key left without one, when the stash is full
+        """
+        for _ in range(self._max_displacements):
+            index = self._free_slot(entry)
+            if index != -1:
+                self._buckets[index] = entry
+                return None
+
+            # Swaps the entry with a random key from its candidate buckets,
+            # which then needs a slot of its own
+            start = self._random.choice(
+                self._candidates(entry.hash, entry.alternate))
+            index = start + self._random.randrange(self._bucket_size)
+            entry, self._buckets[index] = self._buckets[index], entry
+
+        if len(self._stash) < self._stash_size:
+            self._stash.append(entry)
+            return None
+        return entry
+
+    def _rebuild(self, capacity: int, extra: list) -> None:
+        """
+        Moves every key, plus the entries in extra, into a fresh table of
+        at least capacity slots, choosing a new seed until they all fit
+        The table is grown if that takes more than REBUILD_ATTEMPTS seeds
+        """
+        entries = list(self._entries()) + extra
+        attempts = 0
+        while True:
+            self._allocate(capacity)
+            homeless = None
+            for entry in entries:
+                homeless = self._insert(entry)
+                if homeless is not None:
+                    break
+            if homeless is None:
+                return
+
+            # The new seed changes every key's candidate buckets
+            self._seed += 1
+            for entry in entries:
+                entry.alternate = murmur_hash(entry.key, self._seed) | 1
+            attempts += 1
+            if (attempts >= REBUILD_ATTEMPTS
+                    or len(entries) > capacity * self._max_load):
+                capacity *= 2
+                attempts = 0
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key and removes it from the hash map if it exists
+        """
+        index = self._find(key, *self._key_hashes(key))
+        if index == -1:
+            return
+
+        self._size -= 1
+        if index < -1:
+            self._stash.pop(-index - 2)
+            return
+        self._buckets[index] = None
+
+        # The freed slot may be a candidate of a stashed key
+        for entry in list(self._stash):
+            index = self._free_slot(entry)
+            if index != -1:
+                self._buckets[index] = entry
+                self._stash.remove(entry)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Takes in a new_capacity (as an integer) and resizes the table
+        """
+        if new_capacity < self._size:
+            return
+        self._rebuild(new_capacity, [])
+
+    def clear(self) -> None:
+        """
+        Clears the map but keeps the capacity
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+
+    # ------------------------------------------------------------------ #
+
+    def _entries(self):
+        """
+        Yields every entry in the table, then every stashed one
+        """
+        for index in range(self._buckets.length()):
+            entry = self._buckets[index]
+            if entry is not None:
+                yield entry
+        yield from self._stash
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array of the key/value tuples in the map
+        """
+        result = DynamicArray()
+        for entry in self._entries():
+            result.append((entry.key, entry.value))
+        return result
+
+    def __iter__(self):
+        """
+        Iterates over the entries of the map
+        """
+        return self._entries()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(),
+                  m.get_capacity())
+
+    print("\nPDF - get example")
+    print("-----------------")
+    m = HashMap(31, hash_function_1)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    print(m.get('key1'), m.get('key49'), m.get('key50'))
+
+    print("\nPDF - remove example")
+    print("--------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get('key1'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+    m.remove('key1')
+    print(m.get('key1'))
+    m.remove('key4')
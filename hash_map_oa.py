@@ -6,26 +6,121 @@
 # Description: This program is an implementation of a hash map using open
 # addressing with quadratic probing.
 
-from hashmap_helper import (DynamicArray, DynamicArrayException, HashEntry,
-                            hash_function_1, hash_function_2)
+import heapq
+import time
+
+from bloom_filter import BLOOM_FILTERS, make_bloom_filter
+from hash_functions import mixed_hash, resolve_hash_function
+from hash_map_snapshot import load_open_addressing, save_open_addressing
+from hashmap_helper import (CAPACITY_POLICIES, DynamicArray, HashEntry,
+                            MapStats, batch_hash, hash_function_1,
+                            hash_function_2, is_prime, power_of_two_at_least,
+                            prime_at_least)
+
+
+PROBING_MODES = ('quadratic', 'robin_hood')
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 probing: str = 'quadratic',
+                 tombstone_threshold: float = 0.25,
+                 stats: bool = False,
+                 incremental_resize: bool = False,
+                 resize_step: int = 8,
+                 capacity_policy: str = 'prime',
+                 clock: callable = time.monotonic,
+                 sweep_step: int = 4,
+                 bloom: str = None,
+                 bloom_bits_per_key: int = 10) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        probing='robin_hood' uses Robin Hood linear probing with
+        backward-shift deletion instead; its hashes are mixed with fmix64,
+        since runs of nearby hashes would otherwise form long clusters
+        function may be a hash function or its name in HASH_FUNCTIONS
+        tombstone_threshold is the fraction of the capacity that may be
+        tombstones before the table is rehashed in place
+        stats=True collects probe-length histograms and resize counters,
+        see get_stats()
+        incremental_resize=True grows the table by migrating resize_step
+        slots of the old table on each later operation instead of
+        rehashing everything inside a single put
+        capacity_policy='power_of_two' keeps the capacity a power of two:
+        hashes are mixed with fmix64 so the low bits that pick the slot
+        are well distributed, and quadratic probing steps by triangular
+        numbers, which visit every slot of such a table
+        clock gives the current time for keys put with a ttl, and each
+        such put also removes up to sweep_step expired keys, see sweep()
+        bloom, one of BLOOM_FILTERS, keeps a Bloom filter of the keys with
+        bloom_bits_per_key bits for each key the table can hold, so get
+        and contains_key answer most absent keys without probing; use
+        'counting' if keys are removed often, since a standard filter only
+        forgets removed keys when the table is rebuilt
         """
+        if probing not in PROBING_MODES:
+            raise ValueError(f"probing must be one of {PROBING_MODES}")
+        if not 0 < tombstone_threshold <= 1:
+            raise ValueError("tombstone_threshold must be in (0, 1]")
+        if resize_step < 2:
+            raise ValueError("resize_step must be at least 2")
+        if capacity_policy not in CAPACITY_POLICIES:
+            raise ValueError(
+                f"capacity_policy must be one of {CAPACITY_POLICIES}")
+        if bloom is not None and bloom not in BLOOM_FILTERS:
+            raise ValueError(f"bloom must be None or one of {BLOOM_FILTERS}")
+
         self._buckets = DynamicArray()
+        self._power_of_two = capacity_policy == 'power_of_two'
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number (or a power of two)
+        if self._power_of_two:
+            self._capacity = power_of_two_at_least(capacity)
+        else:
+            self._capacity = prime_at_least(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        self._hash_function = function
+        self._hash_function = resolve_hash_function(function)
+        if self._power_of_two or probing == 'robin_hood':
+            self._hash_function = mixed_hash(self._hash_function)
+
+        # Probe j is at offset (j*j + j) / 2 in a power-of-two table and
+        # j*j in a prime one
+        self._triangular = int(self._power_of_two)
         self._size = 0
+        self._robin_hood = probing == 'robin_hood'
+        self._tombstones = 0
+        self._tombstone_threshold = tombstone_threshold
+        self._stats = MapStats() if stats else None
+
+        # Old table still being migrated by an incremental resize
+        self._incremental = incremental_resize
+        self._resize_step = resize_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        # Min-heap of (expiry time, order, key, hash) for keys put with a
+        # ttl. Entries for keys that were since removed or put again are
+        # skipped when they come up
+        self._clock = clock
+        self._sweep_step = sweep_step
+        self._expiry_heap = []
+        self._expiry_order = 0
+
+        # Bumped whenever entries are added, removed or moved, so the
+        # iterators can tell the map changed under them
+        self._version = 0
+
+        # Filter of the keys in the map, and of those in the new table
+        # while an incremental resize is running
+        self._bloom_kind = bloom
+        self._bloom_bits_per_key = bloom_bits_per_key
+        self._bloom = None
+        self._next_bloom = None
+        self._bloom = self._new_bloom(self._capacity)
 
     def __str__(self) -> str:
         """
@@ -86,43 +181,105 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Takes in a key and a value and places it in the hash map
+        With a ttl the key expires that many seconds (of the map's clock)
+        later, after which get and contains_key treat it as absent
+        """
+        hash = self._hash_function(key)
+        if ttl is None:
+            self._put_hashed(key, value, hash)
+        else:
+            expires = self._clock() + ttl
+            self._put_hashed(key, value, hash, expires)
+            self._schedule_expiry(key, hash, expires)
+
+        if self._expiry_heap:
+            self.sweep(self._sweep_step)
+
+    def _put_hashed(self, key: str, value: object, hash: int,
+                    expires: float = None) -> None:
+        """
+        Places the key and value in the hash map given the key's
+        precomputed hash, expiring at the clock time expires if it isn't
+        None
         """
         j = 1
 
-        # Resizes the table if necessary
-        if self.table_load() >= 0.5:
-            new_capacity = self._capacity * 2
-            while not self._is_prime(new_capacity):
-                new_capacity = self._next_prime(new_capacity)
-            self.resize_table(new_capacity)
+        if self._old_buckets is not None:
+            self._migrate_step(self._resize_step)
+
+        # Tombstones still occupy probe slots, so the table is resized once
+        # live entries and tombstones fill half of it: in place if enough
+        # of them are tombstones, otherwise by growing, so a few removes
+        # and puts near the load limit don't rehash the whole table again
+        if (self._size + self._tombstones) / self._capacity >= 0.5:
+            if (self.table_load() < 0.5 and self._tombstones / self._capacity
+                    >= self._tombstone_threshold):
+                self._rehash_in_place()
+            elif self._incremental:
+                self._start_migration(self._grow_capacity(self._capacity))
+            else:
+                self.resize_table(self._grow_capacity(self._capacity))
+
+        # Value is updated in place if the key hasn't been migrated yet
+        if self._old_buckets is not None:
+            index = self._old_find_index(key, hash)
+            if index != -1:
+                self._old_buckets[index].value = value
+                self._old_buckets[index].expires = expires
+                return
+
+        if self._robin_hood:
+            self._rh_put(key, value, hash, expires)
+            return
 
         # Calculates the hash index and keeps track of what the initial is
-        hash = self._hash_function(key)
         hash_index = hash % self._capacity
         hash_initial = hash_index
+        first_tombstone = -1
 
         while True:
             map_index = self._buckets[hash_index]
 
-            if map_index is not None and map_index.is_tombstone is False:
-                # Value is updated if the key already exists
-                if self._buckets[hash_index].key == key:
-                    self._buckets[hash_index].value = value
-                    return
-
-                # Quadratic probing for new index
-                hash_index = (hash_initial + (j*j)) % self._capacity
-                j = j + 1
-            else:
-                # Sets new hash entry
-                hash_obj = HashEntry(key, value)
-                self._buckets.set_at_index(hash_index, hash_obj)
-                self._size += 1
+            if map_index is None:
+                if self._stats is not None:
+                    self._stats.record_insert(j)
+                break
+
+            if map_index.is_tombstone:
+                # Remembers the first reusable slot but keeps probing in
+                # case the key is stored further along the sequence
+                if first_tombstone == -1:
+                    first_tombstone = hash_index
+
+            # Value is updated if the key already exists
+            elif map_index.hash == hash and map_index.key == key:
+                map_index.value = value
+                map_index.expires = expires
+                if self._stats is not None:
+                    self._stats.record_insert(j)
                 return
 
+            # Quadratic probing for new index
+            hash_index = ((hash_initial + ((j*j + self._triangular*j)
+                                          >> self._triangular))
+                          % self._capacity)
+            j = j + 1
+
+        # Sets new hash entry, reusing a tombstone if one was passed
+        if first_tombstone != -1:
+            hash_index = first_tombstone
+            self._tombstones -= 1
+
+        hash_obj = HashEntry(key, value, hash)
+        hash_obj.expires = expires
+        self._buckets.set_at_index(hash_index, hash_obj)
+        self._size += 1
+        self._version += 1
+        self._bloom_add(hash)
+
     def resize_table(self, new_capacity: int) -> None:
         """
         Takes in a new_capacity (as an integer) and resizes the table
@@ -130,23 +287,11 @@ class HashMap:
         if new_capacity < self._size:
             return
 
-        if self._is_prime(new_capacity):
-            old_buckets = self.get_keys_and_values()
-
-            # Sets new self values
-            self._buckets = DynamicArray()
-            self._size = 0
-            self._capacity = new_capacity
-
-            # Appends new_capacity None values
-            for num in range(new_capacity):
-                self._buckets.append(None)
+        if self._power_of_two:
+            self._rehash(power_of_two_at_least(new_capacity))
 
-            # Re-hashes old hash values
-            for num in range(old_buckets.length()):
-                key, value = old_buckets[num]
-                self.put(key, value)
-            return
+        elif is_prime(new_capacity):
+            self._rehash(new_capacity)
 
         # else:
         #     # Gets the next prime
@@ -154,6 +299,96 @@ class HashMap:
         #     self.resize_table(new_capacity)
         return
 
+    def _grow_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity a table of the given capacity grows to: the
+        first prime at or above double that capacity, or just double it
+        for a power-of-two table
+        """
+        if self._power_of_two:
+            return capacity * 2
+        return prime_at_least(capacity * 2)
+
+    def _reserve(self, expected_size: int) -> None:
+        """
+        Grows the table once, up front, so that expected_size entries fit
+        without put triggering any further resizes
+        """
+        new_capacity = self._capacity
+        while (expected_size - 1) / new_capacity >= 0.5:
+            new_capacity = self._grow_capacity(new_capacity)
+
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live entry into a fresh table of new_capacity
+        Entries are placed by their cached hash, so the hash function is
+        never called and no key comparisons are needed
+        """
+        self._finish_migration()
+        old_buckets = self._buckets
+        self._version += 1
+
+        if self._stats is not None:
+            if new_capacity == self._capacity:
+                self._stats.compactions += 1
+            else:
+                self._stats.resizes += 1
+
+        # Sets new self values
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._size = 0
+        self._tombstones = 0
+        self._capacity = new_capacity
+        self._bloom = self._new_bloom(new_capacity)
+
+        # Streams the old table's entries straight into the new one;
+        # expired entries are dropped rather than moved
+        for entry in self._live_in(old_buckets, self._now()):
+            # Grows the same way put would if the table fills up mid-rehash
+            if self.table_load() >= 0.5:
+                self._rehash(self._grow_capacity(self._capacity))
+            self._place(entry)
+            if self._bloom is not None:
+                self._bloom.add(entry.hash)
+            if self._stats is not None:
+                self._stats.rehashed_entries += 1
+
+    def _place(self, entry: HashEntry) -> None:
+        """
+        Places an entry whose key is known to be absent from the table
+        """
+        if self._robin_hood:
+            entry.probe_distance = 0
+            self._rh_place(entry, entry.hash % self._capacity)
+            return
+
+        hash_index = entry.hash % self._capacity
+        j = 1
+        while self._buckets[hash_index] is not None:
+            hash_index = ((entry.hash + ((j*j + self._triangular*j)
+                                         >> self._triangular))
+                          % self._capacity)
+            j += 1
+
+        self._buckets[hash_index] = entry
+        self._size += 1
+
+    def _live_in(self, buckets: DynamicArray, now: float):
+        """
+        Yields the live (non-tombstone, unexpired) entries of a table in
+        slot order
+        """
+        for num in range(buckets.length()):
+            entry = buckets[num]
+            if entry is None or entry.is_tombstone:
+                continue
+            if now is not None and self._expired(entry, now):
+                continue
+            yield entry
+
     def table_load(self) -> float:
         """
         Calculates and returns a float representing the table load factor
@@ -164,8 +399,10 @@ class HashMap:
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets
+        Tombstones are not counted as empty since they still occupy a slot
         """
-        buckets = self._capacity - self._size
+        self._finish_migration()
+        buckets = self._capacity - self._size - self._tombstones
         return buckets
 
     def get(self, key: str) -> object:
@@ -175,21 +412,10 @@ class HashMap:
             Value - At the key
             None - Key doesn't exist
         """
-        # Index for the key
-        hash = self._hash_function(key)
-        hash_index = hash % self.get_capacity()
-        j = 1
-
-        while True:
-            map_index = self._buckets[hash_index]
-
-            if map_index is None or map_index.is_tombstone is True:
-                return
-            elif self._buckets[hash_index].key == key:
-                return self._buckets[hash_index].value
-            else:
-                hash_index = (hash + (j*j)) % self.get_capacity()
-                j += 1
+        entry = self._lookup(key, self._hash_function(key))
+        if entry is None:
+            return
+        return entry.value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -198,16 +424,7 @@ class HashMap:
             True - Key exists
             False - Key doesn't exist
         """
-        hash = self._hash_function(key)
-        hash_index = hash % self.get_capacity()
-        j = 1
-        while self._buckets[hash_index] is not None:
-            if self._buckets[hash_index].key == key:
-                return True
-            else:
-                hash_index = (hash + (j * j)) % self.get_capacity()
-                j += 1
-        return False
+        return self._lookup(key, self._hash_function(key)) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -215,71 +432,588 @@ class HashMap:
         Sets the tombstone value to true if the key exists
         Else it does nothing
         """
-        hash = self._hash_function(key)
+        self._remove_hashed(key, self._hash_function(key))
+
+    def _remove_hashed(self, key: str, hash: int,
+                       counted: bool = True) -> None:
+        """
+        Removes the key given its precomputed hash, if it exists
+        counted=False keeps the search for the key out of the stats
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._resize_step)
+
+        # Keys still in the old table only ever get tombstoned there
+        if self._old_buckets is not None:
+            index = self._old_find_index(key, hash)
+            if index != -1:
+                self._old_buckets[index].is_tombstone = True
+                self._size -= 1
+                self._version += 1
+                self._bloom_remove(hash, old_table=True)
+                return
+
+        index = self._find_index(key, hash, counted)
+        if index == -1:
+            return
+        self._bloom_remove(hash)
+
+        if self._robin_hood:
+            self._rh_remove_at(index)
+            return
+
+        # Sets tombstone and decrements size
+        self._buckets[index].is_tombstone = True
+        self._size = self._size - 1
+        self._tombstones += 1
+        self._version += 1
+        if self._stats is not None:
+            self._stats.tombstones_created += 1
+
+        # Reclaims the dead slots once they make up too much of the table
+        if self._tombstones / self._capacity >= self._tombstone_threshold:
+            self._rehash_in_place()
+
+    def _find_index(self, key: str, hash: int, counted: bool = True) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot holding the live entry for the key
+            -1 - Key doesn't exist
+        Tombstones are probed past rather than treated as the end of the
+        sequence. Quadratic probing only reaches about half the slots of a
+        prime table, so the search also ends once j passes the capacity
+        counted=False keeps the probe count out of the stats
+        """
+        if self._robin_hood:
+            return self._rh_find_index(key, hash, counted)
+
         hash_index = hash % self._capacity
+        now = self._now()
         j = 1
 
         while True:
-            if self._buckets[hash_index] is None:
+            entry = self._buckets[hash_index]
+            if entry is None or j > self._capacity:
+                if self._stats is not None and counted:
+                    self._stats.record_miss(j)
+                return -1
+
+            # Expired entries passed on the way are reclaimed as tombstones
+            if (now is not None and not entry.is_tombstone
+                    and self._expired(entry, now)):
+                entry.is_tombstone = True
+                self._size -= 1
+                self._tombstones += 1
+                self._version += 1
+                self._bloom_remove(entry.hash)
+
+            if (not entry.is_tombstone and entry.hash == hash
+                    and entry.key == key):
+                if self._stats is not None and counted:
+                    self._stats.record_hit(j)
+                return hash_index
+
+            # Quadratic probe
+            hash_index = ((hash + ((j*j + self._triangular*j)
+                                   >> self._triangular))
+                          % self._capacity)
+            j += 1
+
+    def _rehash_in_place(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping every
+        tombstone so probe sequences only pass over live entries
+        """
+        self._rehash(self._capacity)
+
+    def _rh_put(self, key: str, value: object, hash: int,
+                expires: float = None) -> None:
+        """
+        Robin Hood insert: walks forward from the home slot until the key
+        is found or an entry closer to its own home than the probe distance
+        is reached, then places the new entry there
+        """
+        hash_index = hash % self._capacity
+        distance = 0
+
+        while True:
+            current = self._buckets[hash_index]
+            if current is None or current.probe_distance < distance:
+                break
+
+            # Value is updated if the key already exists
+            if current.hash == hash and current.key == key:
+                current.value = value
+                current.expires = expires
+                if self._stats is not None:
+                    self._stats.record_insert(distance + 1)
                 return
-            elif self._buckets[hash_index].key == key:
-                # tombstone is already set
-                if self._buckets[hash_index].is_tombstone == True:
-                    return
-                # Sets tombstone and decrements size
-                self._size = self._size - 1
-                self._buckets[hash_index].is_tombstone = True
+
+            hash_index = (hash_index + 1) % self._capacity
+            distance += 1
+
+        if self._stats is not None:
+            self._stats.record_insert(distance + 1)
+
+        entry = HashEntry(key, value, hash)
+        entry.expires = expires
+        entry.probe_distance = distance
+        self._rh_place(entry, hash_index)
+        self._version += 1
+        self._bloom_add(hash)
+
+    def _rh_place(self, entry: HashEntry, hash_index: int) -> None:
+        """
+        Places an entry starting at hash_index, taking the slot of any
+        entry that is closer to its own home and carrying the displaced
+        entry onward
+        """
+        while True:
+            current = self._buckets[hash_index]
+
+            if current is None:
+                self._buckets[hash_index] = entry
+                self._size += 1
                 return
+
+            # Swaps with the "richer" entry
+            if current.probe_distance < entry.probe_distance:
+                self._buckets[hash_index] = entry
+                entry = current
+
+            hash_index = (hash_index + 1) % self._capacity
+            entry.probe_distance += 1
+
+    def _rh_find_index(self, key: str, hash: int,
+                       counted: bool = True) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot holding the key
+            -1 - Key doesn't exist
+        Stops as soon as the probe distance passes the stored entry's
+        distance, since the key would have displaced that entry
+        counted=False keeps the probe count out of the stats
+        """
+        hash_index = hash % self._capacity
+        distance = 0
+
+        while True:
+            entry = self._buckets[hash_index]
+            if entry is None or entry.probe_distance < distance:
+                if self._stats is not None and counted:
+                    self._stats.record_miss(distance + 1)
+                return -1
+            if entry.hash == hash and entry.key == key:
+                if self._stats is not None and counted:
+                    self._stats.record_hit(distance + 1)
+                return hash_index
+            hash_index = (hash_index + 1) % self._capacity
+            distance += 1
+
+    def _rh_remove_at(self, index: int) -> None:
+        """
+        Removes the entry at index using backward-shift deletion: following
+        entries that are not in their home slot are moved back by one, so
+        no tombstones are left behind
+        """
+        next_index = (index + 1) % self._capacity
+        while True:
+            entry = self._buckets[next_index]
+            if entry is None or entry.probe_distance == 0:
+                break
+            entry.probe_distance -= 1
+            self._buckets[index] = entry
+            index = next_index
+            next_index = (next_index + 1) % self._capacity
+
+        self._buckets[index] = None
+        self._size -= 1
+        self._version += 1
+
+    def _lookup(self, key: str, hash: int, counted: bool = True) -> HashEntry:
+        """
+        Returns the live HashEntry for the key, looking in the old table
+        too while an incremental resize is running, or None if the key
+        doesn't exist
+        counted=False skips the Bloom filter and keeps the lookup out of
+        the stats and the filter's counters, for lookups the map makes
+        itself (sweep)
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._resize_step)
+
+        # Keys the filter rejects were never put (or were removed)
+        if (self._bloom is not None and counted
+                and not self._bloom.might_contain(hash)):
+            return None
+
+        entry = None
+        if self._old_buckets is not None:
+            index = self._old_find_index(key, hash)
+            if index != -1:
+                entry = self._old_buckets[index]
+
+        if entry is None:
+            index = self._find_index(key, hash, counted)
+            if index == -1:
+                if self._bloom is not None and counted:
+                    self._bloom.record_false_positive()
+                return None
+            entry = self._buckets[index]
+
+        # Expired keys are removed on sight, without counting the removal
+        # as a second lookup
+        if entry.expires is not None:
+            now = self._now()
+            if now is not None and self._expired(entry, now):
+                self._remove_hashed(key, hash, counted=False)
+                return None
+        return entry
+
+    def _now(self) -> float:
+        """
+        Returns the clock's time if any key was put with a ttl, otherwise
+        None so maps without expiring keys never read the clock
+        """
+        if self._expiry_order:
+            return self._clock()
+        return None
+
+    @staticmethod
+    def _expired(entry: HashEntry, now: float) -> bool:
+        """
+        Returns True if the entry's key has expired by now
+        """
+        return entry.expires is not None and entry.expires <= now
+
+    def _schedule_expiry(self, key: str, hash: int, expires: float) -> None:
+        """
+        Records when the key expires so sweep can find it
+        """
+        self._expiry_order += 1
+        heapq.heappush(self._expiry_heap,
+                       (expires, self._expiry_order, key, hash))
+
+    def sweep(self, limit: int = 64) -> int:
+        """
+        Takes in the most scheduled expiries to look at
+        Removes expired keys, the earliest expiry first, without scanning
+        the table. Expiries of keys that were removed or put again since
+        count towards limit but remove nothing
+        Returns
+            Int - The number of keys removed
+        """
+        size = self._size
+        now = self._clock()
+
+        while self._expiry_heap and limit > 0:
+            expires, _, key, hash = self._expiry_heap[0]
+            if expires > now:
+                break
+            heapq.heappop(self._expiry_heap)
+            limit -= 1
+
+            # Looking the key up removes it if it has expired
+            self._lookup(key, hash, counted=False)
+
+        return size - self._size
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begins an incremental resize: the current table becomes the old
+        table and new entries go into a fresh table of new_capacity
+        """
+        self._finish_migration()
+        if self._stats is not None:
+            self._stats.resizes += 1
+        self._version += 1
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._next_bloom = self._new_bloom(new_capacity)
+
+    def _migrate_step(self, limit: int) -> None:
+        """
+        Moves the live entries of up to limit slots of the old table into
+        the new one
+        Each moved slot is left as a tombstone carrying the same hash and
+        probe distance, so probe sequences through it stay intact
+        """
+        end = min(self._migrate_index + limit, self._old_capacity)
+
+        for index in range(self._migrate_index, end):
+            entry = self._old_buckets[index]
+            if entry is None or entry.is_tombstone:
+                continue
+
+            marker = HashEntry(entry.key, None, entry.hash)
+            marker.is_tombstone = True
+            marker.probe_distance = entry.probe_distance
+            self._old_buckets[index] = marker
+
+            # _place counts the entry again, it's already in the size
+            self._size -= 1
+            self._place(entry)
+            if self._next_bloom is not None:
+                self._next_bloom.add(entry.hash)
+            if self._stats is not None:
+                self._stats.rehashed_entries += 1
+
+        self._migrate_index = end
+        if end == self._old_capacity:
+            self._old_buckets = None
+            if self._next_bloom is not None:
+                self._next_bloom.inherit_stats(self._bloom)
+                self._bloom = self._next_bloom
+                self._next_bloom = None
+
+    def _finish_migration(self) -> None:
+        """
+        Completes a running incremental resize, if there is one
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._old_capacity)
+
+    def _old_find_index(self, key: str, hash: int) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot of the old table holding the key's live entry
+            -1 - Key isn't in the old table
+        Entries are only ever tombstoned in the old table, never shifted,
+        so both probing modes can skip over tombstones here
+        """
+        capacity = self._old_capacity
+        hash_index = hash % capacity
+        j = 1
+
+        while True:
+            entry = self._old_buckets[hash_index]
+            if entry is None or j > capacity:
+                return -1
+            if self._robin_hood and entry.probe_distance < j - 1:
+                return -1
+            if (not entry.is_tombstone and entry.hash == hash
+                    and entry.key == key):
+                return hash_index
+
+            if self._robin_hood:
+                hash_index = (hash_index + 1) % capacity
             else:
-                # Quadratic probe
-                hash_index = (hash + (j*j)) % self._capacity
-                j += 1
+                hash_index = ((hash + ((j*j + self._triangular*j)
+                                       >> self._triangular))
+                              % capacity)
+            j += 1
+
+    def _new_bloom(self, capacity: int):
+        """
+        Returns an empty Bloom filter sized for a table of capacity, which
+        keeps the lookup counters of the current filter, or None if the
+        map has no filter
+        """
+        if self._bloom_kind is None:
+            return None
+
+        # The table is resized before it gets half full
+        bloom = make_bloom_filter(self._bloom_kind, capacity // 2 + 1,
+                                  self._bloom_bits_per_key)
+        if self._bloom is not None:
+            bloom.inherit_stats(self._bloom)
+        return bloom
+
+    def _bloom_add(self, hash: int) -> None:
+        """
+        Records a newly put key in the filter, and in the new table's
+        filter while an incremental resize is running
+        """
+        if self._bloom is not None:
+            self._bloom.add(hash)
+            if self._next_bloom is not None:
+                self._next_bloom.add(hash)
+
+    def _bloom_remove(self, hash: int, old_table: bool = False) -> None:
+        """
+        Forgets a removed key in the filter, and in the new table's filter
+        too unless the key was still in the old table
+        """
+        if self._bloom is not None:
+            self._bloom.remove(hash)
+            if self._next_bloom is not None and not old_table:
+                self._next_bloom.remove(hash)
+
+    def put_many(self, items) -> None:
+        """
+        Takes in an iterable of (key, value) pairs and places them all in
+        the hash map
+        Keys are hashed in one batch and the table is grown at most once
+        """
+        items = list(items)
+        if not items:
+            return
+
+        hashes = batch_hash(self._hash_function, [key for key, _ in items])
+        self._reserve(self._size + len(items))
+
+        for num in range(len(items)):
+            key, value = items[num]
+            self._put_hashed(key, value, hashes[num])
+
+    def get_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - Value for each key in input order, None where the key
+            doesn't exist
+        """
+        keys = list(keys)
+        hashes = batch_hash(self._hash_function, keys)
+
+        values = []
+        for num in range(len(keys)):
+            entry = self._lookup(keys[num], hashes[num])
+            values.append(None if entry is None else entry.value)
+        return values
+
+    def contains_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - True/False for each key in input order
+        """
+        keys = list(keys)
+        hashes = batch_hash(self._hash_function, keys)
+        return [self._lookup(keys[num], hashes[num]) is not None
+                for num in range(len(keys))]
+
+    def remove_many(self, keys) -> None:
+        """
+        Takes in an iterable of keys and removes each one that exists
+        """
+        keys = list(keys)
+        hashes = batch_hash(self._hash_function, keys)
+        for num in range(len(keys)):
+            self._remove_hashed(keys[num], hashes[num])
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary of statistics for a map created with
+        stats=True: probe-length histograms for lookup hits, lookup misses
+        and inserts, resize/compaction/rehash counters and the current
+        tombstone count, plus the Bloom filter's fill and false-positive
+        rates under 'bloom' if the map has one
+        Raises ValueError if stats were not enabled
+        """
+        if self._stats is None:
+            raise ValueError("stats were not enabled for this HashMap")
+
+        stats = self._stats.as_dict()
+        stats['size'] = self._size
+        stats['capacity'] = self._capacity
+        stats['load'] = self.table_load()
+        stats['tombstones'] = self._tombstones
+        stats['empty_buckets'] = self.empty_buckets()
+        if self._bloom is not None:
+            stats['bloom'] = self._bloom.get_stats()
+        return stats
+
+    def reset_stats(self) -> None:
+        """
+        Zeroes the collected statistics, if stats are enabled
+        """
+        if self._stats is not None:
+            self._stats = MapStats()
+        if self._bloom is not None:
+            self._bloom.reset_stats()
+
+    def save(self, path: str) -> None:
+        """
+        Takes in a file path and writes a binary snapshot of the hash map
+        to it, see hash_map_snapshot
+        """
+        save_open_addressing(self, path)
+
+    @classmethod
+    def load(cls, path: str, function=None) -> "HashMap":
+        """
+        Takes in the path of a snapshot written by save and the hash
+        function (None to use the one named in the snapshot)
+        Returns:
+            HashMap - the saved map, rebuilt without rehashing any key
+        The values are unpickled, so only load snapshots from a trusted
+        source
+        """
+        return load_open_addressing(cls, path, function)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a DynamicArray of tuples containing (keys, values)
         """
         new_da = DynamicArray()
-        for num in range(self._buckets.length()):
-            if self._buckets[num] is not None:
-                if not self._buckets[num].is_tombstone:
-                    tup = self._buckets[num].key, self._buckets[num].value
-                    new_da.append(tup)
-
+        for tup in self.items():
+            new_da.append(tup)
         return new_da
 
+    def _entries(self):
+        """
+        Yields every live entry in slot order
+        Raises RuntimeError if the map is changed in between
+        """
+        self._finish_migration()
+        version = self._version
+        for entry in self._live_in(self._buckets, self._now()):
+            yield entry
+            if self._version != version:
+                raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Returns a new iterator over the keys, which reads the table as it
+        goes instead of copying it
+        """
+        return (entry.key for entry in self._entries())
+
+    def values(self):
+        """
+        Returns a new iterator over the values
+        """
+        return (entry.value for entry in self._entries())
+
+    def items(self):
+        """
+        Returns a new iterator over the (key, value) tuples
+        """
+        return ((entry.key, entry.value) for entry in self._entries())
+
     def clear(self) -> None:
         """
         Sets each index in the hash map to None
         """
+        self._old_buckets = None
         for x in range(self._buckets.length()):
             if self._buckets[x] is not None:
                 self._buckets[x] = None
-                self._size -= 1
+        self._size = 0
+        self._tombstones = 0
+        self._expiry_heap = []
+        self._expiry_order = 0
+        self._version += 1
+        self._next_bloom = None
+        self._bloom = self._new_bloom(self._capacity)
         return
 
     def __iter__(self):
         """
-        Sets the iterator
-        """
-        self._index = 0
-        return self
-
-    def __next__(self):
-        """
-        Returns the next value of the iterator
-        Stops iteration upon reaching the end of the array
+        Returns a new iterator over the live HashEntry objects, so nested
+        loops over the same map don't interfere
         """
-        try:
-            value = self._buckets[self._index]
-            while value is None or value.is_tombstone:
-                self._index = self._index + 1
-                value = self._buckets[self._index]
-        except DynamicArrayException:
-            raise StopIteration
-
-        self._index = self._index + 1
-        return value
+        return self._entries()
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -0,0 +1,636 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Open addressing hash map with quadratic probing that stores
+# its table as parallel compact arrays (struct-of-arrays) instead of one
+# HashEntry object per slot. Hashes live in an array('Q'), slot states in a
+# bytearray, and keys and values in plain lists.
+# Hash codes are reduced to unsigned 64 bits before they are stored.
+
+from array import array
+
+from hash_functions import MASK64, resolve_hash_function
+from hashmap_helper import (DynamicArray, HashEntry, batch_hash,
+                            hash_function_1, hash_function_2, is_prime,
+                            prime_at_least)
+
+# Slot states kept in the flags bytearray
+EMPTY = 0
+LIVE = 1
+DELETED = 2
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 tombstone_threshold: float = 0.25) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        tombstone_threshold is the fraction of the capacity that may be
+        tombstones before the table is rehashed in place
+        function may be a hash function or its name in HASH_FUNCTIONS
+        """
+        if not 0 < tombstone_threshold <= 1:
+            raise ValueError("tombstone_threshold must be in (0, 1]")
+
+        # capacity must be a prime number
+        self._capacity = prime_at_least(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = resolve_hash_function(function)
+        self._size = 0
+        self._tombstones = 0
+
+        # Bumped whenever entries are added, removed or moved, so the
+        # iterators can tell the map changed under them
+        self._version = 0
+        self._tombstone_threshold = tombstone_threshold
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the storage with empty arrays of the given capacity
+        """
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._flags = bytearray(capacity)
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry_at(i)) + '\n'
+        return out
+
+    def _entry_at(self, index: int) -> HashEntry:
+        """
+        Returns a HashEntry view of the slot at index, or None if empty
+        """
+        if self._flags[index] == EMPTY:
+            return None
+        entry = HashEntry(self._keys[index], self._values[index],
+                          self._hashes[index])
+        entry.is_tombstone = self._flags[index] == DELETED
+        return entry
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the key's hash reduced to the unsigned 64 bits stored in
+        the hash array
+        """
+        return self._hash_function(key) & MASK64
+
+    def _hash_batch(self, keys: list) -> list:
+        """
+        Returns the reduced hashes of every key, hashed in one batch
+        """
+        return [hash & MASK64
+                for hash in batch_hash(self._hash_function, keys)]
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and places it in the hash map
+        """
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places the key and value in the hash map given the key's
+        precomputed hash
+        """
+        # Tombstones still occupy probe slots, so the table is resized once
+        # live slots and tombstones fill half of it: in place if enough of
+        # them are tombstones, otherwise by growing
+        if (self._size + self._tombstones) / self._capacity >= 0.5:
+            if (self.table_load() < 0.5 and self._tombstones / self._capacity
+                    >= self._tombstone_threshold):
+                self._rehash(self._capacity)
+            else:
+                self.resize_table(self._grow_capacity(self._capacity))
+
+        flags, hashes, keys = self._flags, self._hashes, self._keys
+        capacity = self._capacity
+        hash_index = hash % capacity
+        hash_initial = hash_index
+        first_tombstone = -1
+        j = 1
+
+        while True:
+            flag = flags[hash_index]
+
+            if flag == EMPTY:
+                break
+
+            if flag == DELETED:
+                # Remembers the first reusable slot but keeps probing in
+                # case the key is stored further along the sequence
+                if first_tombstone == -1:
+                    first_tombstone = hash_index
+
+            # Value is updated if the key already exists
+            elif hashes[hash_index] == hash and keys[hash_index] == key:
+                self._values[hash_index] = value
+                return
+
+            # Quadratic probing for new index
+            hash_index = (hash_initial + (j*j)) % capacity
+            j = j + 1
+
+        # Sets new slot, reusing a tombstone if one was passed
+        if first_tombstone != -1:
+            hash_index = first_tombstone
+            self._tombstones -= 1
+
+        flags[hash_index] = LIVE
+        hashes[hash_index] = hash
+        keys[hash_index] = key
+        self._values[hash_index] = value
+        self._size += 1
+        self._version += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Takes in a new_capacity (as an integer) and resizes the table
+        """
+        if new_capacity < self._size:
+            return
+
+        if is_prime(new_capacity):
+            self._rehash(new_capacity)
+
+    def _grow_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity a table of the given capacity grows to: the
+        first prime at or above double that capacity
+        """
+        return prime_at_least(capacity * 2)
+
+    def _reserve(self, expected_size: int) -> None:
+        """
+        Grows the table once, up front, so that expected_size entries fit
+        without put triggering any further resizes
+        """
+        new_capacity = self._capacity
+        while (expected_size - 1) / new_capacity >= 0.5:
+            new_capacity = self._grow_capacity(new_capacity)
+
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live slot into fresh arrays of new_capacity using the
+        stored hashes, so the hash function is never called
+        """
+        old_flags, old_hashes = self._flags, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        self._size = 0
+        self._version += 1
+        self._tombstones = 0
+
+        for num in range(len(old_flags)):
+            if old_flags[num] != LIVE:
+                continue
+
+            # Grows the same way put would if the table fills up mid-rehash
+            if self.table_load() >= 0.5:
+                self._rehash(self._grow_capacity(self._capacity))
+
+            hash = old_hashes[num]
+            hash_index = hash % self._capacity
+            j = 1
+            while self._flags[hash_index] != EMPTY:
+                hash_index = (hash + (j*j)) % self._capacity
+                j += 1
+
+            self._flags[hash_index] = LIVE
+            self._hashes[hash_index] = hash
+            self._keys[hash_index] = old_keys[num]
+            self._values[hash_index] = old_values[num]
+            self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns a float representing the table load factor
+        """
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets
+        Tombstones are not counted as empty since they still occupy a slot
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        index = self._find_index(key, self._hash(key))
+        if index == -1:
+            return
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        return self._find_index(key, self._hash(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key
+        Marks the slot as deleted if the key exists
+        Else it does nothing
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Removes the key given its precomputed hash, if it exists
+        """
+        index = self._find_index(key, hash)
+        if index == -1:
+            return
+
+        self._flags[index] = DELETED
+        self._size -= 1
+        self._tombstones += 1
+        self._version += 1
+
+        # Reclaims the dead slots once they make up too much of the table
+        if self._tombstones / self._capacity >= self._tombstone_threshold:
+            self._rehash(self._capacity)
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot holding the live entry for the key
+            -1 - Key doesn't exist
+        Only the hash array is touched until a stored hash matches
+        """
+        flags, hashes, keys = self._flags, self._hashes, self._keys
+        capacity = self._capacity
+        hash_index = hash % capacity
+        j = 1
+
+        while True:
+            flag = flags[hash_index]
+
+            # Quadratic probing only reaches about half the slots of a
+            # prime table, so give up once every reachable one was seen
+            if flag == EMPTY or j > capacity:
+                return -1
+            if (flag == LIVE and hashes[hash_index] == hash
+                    and keys[hash_index] == key):
+                return hash_index
+
+            # Quadratic probe
+            hash_index = (hash + (j*j)) % capacity
+            j += 1
+
+    def put_many(self, items) -> None:
+        """
+        Takes in an iterable of (key, value) pairs and places them all in
+        the hash map
+        Keys are hashed in one batch and the table is grown at most once
+        """
+        items = list(items)
+        if not items:
+            return
+
+        hashes = self._hash_batch([key for key, _ in items])
+        self._reserve(self._size + len(items))
+
+        for num in range(len(items)):
+            key, value = items[num]
+            self._put_hashed(key, value, hashes[num])
+
+    def get_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - Value for each key in input order, None where the key
+            doesn't exist
+        """
+        keys = list(keys)
+        hashes = self._hash_batch(keys)
+
+        values = []
+        for num in range(len(keys)):
+            index = self._find_index(keys[num], hashes[num])
+            values.append(None if index == -1 else self._values[index])
+        return values
+
+    def contains_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - True/False for each key in input order
+        """
+        keys = list(keys)
+        hashes = self._hash_batch(keys)
+        return [self._find_index(keys[num], hashes[num]) != -1
+                for num in range(len(keys))]
+
+    def remove_many(self, keys) -> None:
+        """
+        Takes in an iterable of keys and removes each one that exists
+        """
+        keys = list(keys)
+        hashes = self._hash_batch(keys)
+        for num in range(len(keys)):
+            self._remove_hashed(keys[num], hashes[num])
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray of tuples containing (keys, values)
+        """
+        new_da = DynamicArray()
+        for tup in self.items():
+            new_da.append(tup)
+        return new_da
+
+    def _live_indexes(self):
+        """
+        Yields the index of every live slot in slot order
+        Raises RuntimeError if the map is changed in between
+        """
+        version = self._version
+        index = self._flags.find(LIVE)
+        while index != -1:
+            yield index
+            if self._version != version:
+                raise RuntimeError("HashMap changed during iteration")
+            index = self._flags.find(LIVE, index + 1)
+
+    def keys(self):
+        """
+        Returns a new iterator over the keys, which reads the table as it
+        goes instead of copying it
+        """
+        return (self._keys[index] for index in self._live_indexes())
+
+    def values(self):
+        """
+        Returns a new iterator over the values
+        """
+        return (self._values[index] for index in self._live_indexes())
+
+    def items(self):
+        """
+        Returns a new iterator over the (key, value) tuples
+        """
+        return ((self._keys[index], self._values[index])
+                for index in self._live_indexes())
+
+    def clear(self) -> None:
+        """
+        Empties every slot in the hash map
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+        self._version += 1
+
+    def __iter__(self):
+        """
+        Returns a new iterator over the live entries (as HashEntry
+        objects), so nested loops over the same map don't interfere
+        """
+        return (self._entry_at(index) for index in self._live_indexes())
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        # print(i % 10)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - resize example 1")
+    print("----------------------")
+    m = HashMap(20, hash_function_1)
+    m.put('key1', 10)
+    print(m.get_size(), m.get_capacity(), m.get('key1'), m.contains_key('key1'))
+    m.resize_table(30)
+    print(m.get_size(), m.get_capacity(), m.get('key1'), m.contains_key('key1'))
+
+    print("\nPDF - resize example 2")
+    print("----------------------")
+    m = HashMap(75, hash_function_2)
+    keys = [i for i in range(25, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+
+        if m.table_load() > 0.5:
+            print(f"Check that the load factor is acceptable after the call to resize_table().\n"
+                  f"Your load factor is {round(m.table_load(), 2)} and should be less than or equal to 0.5")
+
+        m.put('some key', 'some value')
+        result = m.contains_key('some key')
+        m.remove('some key')
+
+        for key in keys:
+            # all inserted keys must be present
+            result &= m.contains_key(str(key))
+            # NOT inserted keys must be absent
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nPDF - table_load example 1")
+    print("--------------------------")
+    m = HashMap(101, hash_function_1)
+    print(round(m.table_load(), 2))
+    m.put('key1', 10)
+    print(round(m.table_load(), 2))
+    m.put('key2', 20)
+    print(round(m.table_load(), 2))
+    m.put('key1', 30)
+    print(round(m.table_load(), 2))
+
+    print("\nPDF - table_load example 2")
+    print("--------------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(50):
+        m.put('key' + str(i), i * 100)
+        if i % 10 == 0:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - empty_buckets example 1")
+    print("-----------------------------")
+    m = HashMap(101, hash_function_1)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key2', 20)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key1', 30)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key4', 40)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+
+    print("\nPDF - empty_buckets example 2")
+    print("-----------------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('key' + str(i), i * 100)
+        if i % 30 == 0:
+            print(m.empty_buckets(), m.get_size(), m.get_capacity())
+
+    print("\nPDF - get example 1")
+    print("-------------------")
+    m = HashMap(31, hash_function_1)
+    print(m.get('key'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+
+    print("\nPDF - get example 2")
+    print("-------------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nPDF - contains_key example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.contains_key('key1'))
+    m.put('key1', 10)
+    m.put('key2', 20)
+    m.put('key3', 30)
+    print(m.contains_key('key1'))
+    print(m.contains_key('key4'))
+    print(m.contains_key('key2'))
+    print(m.contains_key('key3'))
+    m.remove('key3')
+    print(m.contains_key('key3'))
+
+    print("\nPDF - contains_key example 2")
+    print("----------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+
+    print("\nPDF - remove example 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get('key1'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+    m.remove('key1')
+    print(m.get('key1'))
+    m.remove('key4')
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
+
+    print("\nPDF - clear example 1")
+    print("---------------------")
+    m = HashMap(101, hash_function_1)
+    print(m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    m.put('key2', 20)
+    m.put('key1', 30)
+    print(m.get_size(), m.get_capacity())
+    m.clear()
+    print(m.get_size(), m.get_capacity())
+
+    print("\nPDF - clear example 2")
+    print("---------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    print(m.get_size(), m.get_capacity())
+    m.put('key2', 20)
+    print(m.get_size(), m.get_capacity())
+    m.resize_table(100)
+    print(m.get_size(), m.get_capacity())
+    m.clear()
+    print(m.get_size(), m.get_capacity())
+
+    print("\nPDF - __iter__(), __next__() example 1")
+    print("---------------------")
+    m = HashMap(10, hash_function_1)
+    for i in range(5):
+        m.put(str(i), str(i * 10))
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
+
+    print("\nPDF - __iter__(), __next__() example 2")
+    print("---------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
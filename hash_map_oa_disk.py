@@ -0,0 +1,535 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Open addressing hash map kept on disk, for tables larger than
+# memory. It probes quadratically over a prime capacity and uses tombstones,
+# like hash_map_oa. The slot table is a file of fixed-size records that is
+# memory-mapped, so the OS keeps the hot pages cached. Keys and values are
+# appended to a separate heap file and never rewritten in place.
+#
+#     <path>.slots      HEADER, then capacity SLOT records
+#     <path>.heap.<n>   RECORD, key (UTF-8) and pickled value, back to back
+#
+# Resizing writes a new slot file and renames it over the old one. When most
+# of the heap is dead records it is copied into a new heap file (the next
+# generation <n>) first, so a crash never leaves the two files out of step.
+
+import mmap
+import os
+import pickle
+import struct
+
+from hash_functions import MASK64, hash_function_name, resolve_hash_function
+from hashmap_helper import (DynamicArray, HashEntry, hash_function_1,
+                            is_prime, prime_at_least)
+
+MAGIC = b'HMDISK'
+FORMAT_VERSION = 1
+
+# magic, version, heap generation, capacity, size, tombstones, dead heap
+# bytes, hash function name
+HEADER = struct.Struct('<6sHIQQQQ64s')
+TABLE_START = 128
+
+# state, hash, heap offset
+SLOT = struct.Struct('<B7xQQ')
+SLOT_EMPTY = 0
+SLOT_LIVE = 1
+SLOT_TOMBSTONE = 2
+
+# key length, value length
+RECORD = struct.Struct('<II')
+
+# none:   never fsync, the OS writes pages back when it likes
+# close:  fsync on flush() and close()
+# always: fsync after every put and remove
+SYNC_POLICIES = ('none', 'close', 'always')
+
+
+class HashMap:
+    def __init__(self, path: str, capacity: int = 11, function=None,
+                 sync: str = 'close',
+                 tombstone_threshold: float = 0.25) -> None:
+        """
+        Opens the disk-backed HashMap stored at path, creating it with the
+        given capacity if it doesn't exist yet
+        function may be a hash function or its name in HASH_FUNCTIONS. An
+        existing map remembers the name of a registered function, so it
+        can be left out; a new map defaults to hash_function_1
+        sync is one of SYNC_POLICIES
+        """
+        if sync not in SYNC_POLICIES:
+            raise ValueError(f"sync must be one of {SYNC_POLICIES}")
+        if not 0 < tombstone_threshold <= 1:
+            raise ValueError("tombstone_threshold must be in (0, 1]")
+
+        self._path = path
+        self._sync = sync
+        self._tombstone_threshold = tombstone_threshold
+
+        if os.path.exists(self._slots_path()):
+            self._open(function)
+        else:
+            self._hash_function = resolve_hash_function(
+                function or hash_function_1)
+            self._generation = 0
+            self._heap = open(self._heap_path(0), 'w+b')
+            self._slots_file, self._mmap = self._create_slots(
+                self._slots_path(), prime_at_least(capacity))
+            self._capacity = prime_at_least(capacity)
+            self._size = 0
+            self._tombstones = 0
+            self._dead_bytes = 0
+            self._write_header()
+
+    def _slots_path(self) -> str:
+        """Returns the path of the slot file"""
+        return self._path + '.slots'
+
+    def _heap_path(self, generation: int) -> str:
+        """Returns the path of the heap file of the given generation"""
+        return f"{self._path}.heap.{generation}"
+
+    def _open(self, function) -> None:
+        """
+        Opens the files of an existing map and reads its header
+        """
+        self._slots_file = open(self._slots_path(), 'r+b')
+        self._mmap = mmap.mmap(self._slots_file.fileno(), 0)
+
+        (magic, version, self._generation, self._capacity, self._size,
+         self._tombstones, self._dead_bytes,
+         name) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{self._slots_path()} is not a disk HashMap")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self._slots_path()} is version {version}, "
+                             f"only version {FORMAT_VERSION} is supported")
+
+        name = name.rstrip(b'\0').decode('utf-8')
+        if function is None:
+            if not name:
+                raise ValueError("the map's hash function isn't in "
+                                 "HASH_FUNCTIONS, pass it in explicitly")
+            function = name
+        self._hash_function = resolve_hash_function(function)
+        if name and hash_function_name(self._hash_function) != name:
+            raise ValueError(f"the map was built with hash function {name}")
+
+        self._heap = open(self._heap_path(self._generation), 'r+b')
+
+    def _create_slots(self, path: str, capacity: int) -> tuple:
+        """
+        Creates a slot file of capacity empty slots
+        Returns
+            (file, mmap) - The open file and its read-write mapping
+        """
+        file = open(path, 'w+b')
+        file.truncate(TABLE_START + capacity * SLOT.size)
+        return file, mmap.mmap(file.fileno(), 0)
+
+    def _write_header(self) -> None:
+        """
+        Stores the current counters in the slot file's header
+        """
+        name = (hash_function_name(self._hash_function) or '').encode('utf-8')
+        HEADER.pack_into(self._mmap, 0, MAGIC, FORMAT_VERSION,
+                         self._generation, self._capacity, self._size,
+                         self._tombstones, self._dead_bytes, name)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry_at(i)) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _slot(self, index: int) -> tuple:
+        """
+        Returns (state, hash, heap offset) of the slot at index
+        """
+        return SLOT.unpack_from(self._mmap, TABLE_START + index * SLOT.size)
+
+    def _set_slot(self, index: int, state: int, hash: int,
+                  offset: int) -> None:
+        """
+        Overwrites the slot at index
+        """
+        SLOT.pack_into(self._mmap, TABLE_START + index * SLOT.size,
+                       state, hash, offset)
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the key's hash, reduced to the 64 bits a slot stores
+        """
+        return self._hash_function(key) & MASK64
+
+    def _append(self, key_bytes: bytes, value: object) -> int:
+        """
+        Appends a record to the heap
+        Returns
+            The record's offset in the heap file
+        """
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._heap.seek(0, os.SEEK_END)
+        offset = self._heap.tell()
+        self._heap.write(RECORD.pack(len(key_bytes), len(value_bytes))
+                         + key_bytes + value_bytes)
+        return offset
+
+    def _record_size(self, offset: int) -> int:
+        """
+        Returns the length in bytes of the heap record at offset
+        """
+        self._heap.seek(offset)
+        key_length, value_length = RECORD.unpack(
+            self._heap.read(RECORD.size))
+        return RECORD.size + key_length + value_length
+
+    def _read_record(self, offset: int) -> tuple:
+        """
+        Returns (key, value) of the heap record at offset
+        """
+        self._heap.seek(offset)
+        key_length, value_length = RECORD.unpack(
+            self._heap.read(RECORD.size))
+        key = self._heap.read(key_length).decode('utf-8')
+        return key, pickle.loads(self._heap.read(value_length))
+
+    def _key_matches(self, offset: int, key_bytes: bytes) -> bool:
+        """
+        Returns True if the heap record at offset holds the key
+        """
+        self._heap.seek(offset)
+        data = self._heap.read(RECORD.size + len(key_bytes))
+        key_length, _ = RECORD.unpack_from(data)
+        return (key_length == len(key_bytes)
+                and data[RECORD.size:] == key_bytes)
+
+    def _entry_at(self, index: int) -> HashEntry:
+        """
+        Returns a HashEntry read from the slot at index, or None if the
+        slot is empty
+        """
+        state, hash, offset = self._slot(index)
+        if state == SLOT_EMPTY:
+            return None
+        entry = HashEntry(*self._read_record(offset), hash)
+        entry.is_tombstone = state == SLOT_TOMBSTONE
+        return entry
+
+    def _wrote(self) -> None:
+        """
+        Updates the header after a change, syncing if the policy says so
+        """
+        self._write_header()
+        if self._sync == 'always':
+            self.flush()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and places it in the hash map
+        The new record is appended to the heap; one it replaces is left
+        behind as dead bytes until the heap is compacted
+        """
+        # Tombstones still occupy probe slots, so the table is resized once
+        # live slots and tombstones fill half of it: in place if enough of
+        # them are tombstones, otherwise by growing, since every rehash
+        # rewrites the whole slot file
+        if (self._size + self._tombstones) / self._capacity >= 0.5:
+            if (self.table_load() < 0.5 and self._tombstones / self._capacity
+                    >= self._tombstone_threshold):
+                self._rehash(self._capacity)
+            else:
+                self._rehash(self._grow_capacity(self._capacity))
+
+        hash = self._hash(key)
+        key_bytes = key.encode('utf-8')
+        hash_index = hash % self._capacity
+        first_tombstone = -1
+        j = 1
+
+        while True:
+            state, slot_hash, offset = self._slot(hash_index)
+            if state == SLOT_EMPTY:
+                break
+
+            if state == SLOT_TOMBSTONE:
+                if first_tombstone == -1:
+                    first_tombstone = hash_index
+
+            # Value is updated if the key already exists
+            elif slot_hash == hash and self._key_matches(offset, key_bytes):
+                self._dead_bytes += self._record_size(offset)
+                self._set_slot(hash_index, SLOT_LIVE, hash,
+                               self._append(key_bytes, value))
+                self._wrote()
+                return
+
+            # Quadratic probing for new index
+            hash_index = (hash + (j*j)) % self._capacity
+            j += 1
+
+        # Reuses a tombstone if one was passed
+        if first_tombstone != -1:
+            hash_index = first_tombstone
+            self._tombstones -= 1
+
+        self._set_slot(hash_index, SLOT_LIVE, hash,
+                       self._append(key_bytes, value))
+        self._size += 1
+        self._wrote()
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot holding the live entry for the key
+            -1 - Key doesn't exist
+        """
+        key_bytes = key.encode('utf-8')
+        hash_index = hash % self._capacity
+        j = 1
+
+        while j <= self._capacity:
+            state, slot_hash, offset = self._slot(hash_index)
+            if state == SLOT_EMPTY:
+                return -1
+            if (state == SLOT_LIVE and slot_hash == hash
+                    and self._key_matches(offset, key_bytes)):
+                return hash_index
+
+            # Quadratic probe
+            hash_index = (hash + (j*j)) % self._capacity
+            j += 1
+
+        return -1
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        index = self._find_index(key, self._hash(key))
+        if index == -1:
+            return
+        return self._read_record(self._slot(index)[2])[1]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        return self._find_index(key, self._hash(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key
+        Turns its slot into a tombstone if the key exists
+        Else it does nothing
+        """
+        hash = self._hash(key)
+        index = self._find_index(key, hash)
+        if index == -1:
+            return
+
+        _, _, offset = self._slot(index)
+        self._dead_bytes += self._record_size(offset)
+        self._set_slot(index, SLOT_TOMBSTONE, hash, offset)
+        self._size -= 1
+        self._tombstones += 1
+
+        # Reclaims the dead slots once they make up too much of the table
+        if self._tombstones / self._capacity >= self._tombstone_threshold:
+            self._rehash(self._capacity)
+        self._wrote()
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns a float representing the table load factor
+        """
+        return float(self.get_size() / self.get_capacity())
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets
+        Tombstones are not counted as empty since they still occupy a slot
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Takes in a new_capacity (as an integer) and resizes the table
+        Like hash_map_oa, capacities that aren't prime are ignored
+        """
+        if new_capacity < self._size:
+            return
+
+        if is_prime(new_capacity):
+            self._rehash(new_capacity)
+
+    def _grow_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity a table of the given capacity grows to: the
+        first prime at or above double that capacity
+        """
+        return prime_at_least(capacity * 2)
+
+    def _rehash(self, new_capacity: int, compact: bool = None) -> None:
+        """
+        Moves every live slot into a new slot file of new_capacity, placed
+        by its stored hash so no key is read from the heap
+        The heap is compacted too when compact is True, or by default when
+        more than half of it is dead records
+        """
+        # Grows further if the entries wouldn't fit under the load limit
+        while self._size and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = self._grow_capacity(new_capacity)
+
+        self._heap.flush()
+        heap_end = self._heap.seek(0, os.SEEK_END)
+        if compact is None:
+            compact = self._dead_bytes * 2 > heap_end
+
+        new_heap = None
+        if compact:
+            new_heap = open(self._heap_path(self._generation + 1), 'w+b')
+
+        temporary = self._slots_path() + '.tmp'
+        slots_file, slots = self._create_slots(temporary, new_capacity)
+
+        for index in range(self._capacity):
+            state, hash, offset = self._slot(index)
+            if state != SLOT_LIVE:
+                continue
+
+            if new_heap is not None:
+                size = self._record_size(offset)
+                self._heap.seek(offset)
+                record = self._heap.read(size)
+                offset = new_heap.tell()
+                new_heap.write(record)
+
+            hash_index = hash % new_capacity
+            j = 1
+            while SLOT.unpack_from(
+                    slots, TABLE_START + hash_index * SLOT.size)[0]:
+                hash_index = (hash + (j*j)) % new_capacity
+                j += 1
+            SLOT.pack_into(slots, TABLE_START + hash_index * SLOT.size,
+                           SLOT_LIVE, hash, offset)
+
+        # The new heap has to be on disk before the slots that point at it
+        if new_heap is not None:
+            new_heap.flush()
+            if self._sync != 'none':
+                os.fsync(new_heap.fileno())
+
+        old_mmap, old_file = self._mmap, self._slots_file
+        self._mmap, self._slots_file = slots, slots_file
+        self._capacity = new_capacity
+        self._tombstones = 0
+        if new_heap is not None:
+            self._generation += 1
+            self._dead_bytes = 0
+        self._write_header()
+
+        self._mmap.flush()
+        old_mmap.close()
+        old_file.close()
+        os.replace(temporary, self._slots_path())
+
+        if new_heap is not None:
+            self._heap.close()
+            os.remove(self._heap_path(self._generation - 1))
+            self._heap = new_heap
+
+    def compact(self) -> None:
+        """
+        Rewrites the heap with only the live records and drops every
+        tombstone, keeping the capacity
+        """
+        self._rehash(self._capacity, compact=True)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray of tuples containing (keys, values)
+        Reads every live record, so the result must fit in memory
+        """
+        new_da = DynamicArray()
+        for index in range(self._capacity):
+            state, _, offset = self._slot(index)
+            if state == SLOT_LIVE:
+                new_da.append(self._read_record(offset))
+        return new_da
+
+    def clear(self) -> None:
+        """
+        Removes every entry, keeping the capacity, and starts a new heap
+        """
+        for index in range(self._capacity):
+            self._set_slot(index, SLOT_EMPTY, 0, 0)
+        self._size = 0
+        self._tombstones = 0
+        self._heap.truncate(0)
+        self._dead_bytes = 0
+        self._wrote()
+
+    def flush(self) -> None:
+        """
+        Writes every change to disk: the slot file with msync and the heap
+        with fsync
+        """
+        self._heap.flush()
+        os.fsync(self._heap.fileno())
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """
+        Closes the files, syncing them first unless the policy is 'none'
+        """
+        if self._mmap.closed:
+            return
+        self._write_header()
+        if self._sync != 'none':
+            self.flush()
+        self._mmap.close()
+        self._slots_file.close()
+        self._heap.close()
+
+    def __enter__(self) -> "HashMap":
+        """Use as a context manager that closes the map on exit"""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Closes the map"""
+        self.close()
+
+    def __iter__(self):
+        """
+        Returns an iterator over the live entries, read from disk one at
+        a time
+        """
+        for index in range(self._capacity):
+            entry = self._entry_at(index)
+            if entry is not None and not entry.is_tombstone:
+                yield entry
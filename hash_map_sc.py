@@ -6,29 +6,125 @@
 # Description: This program is an implementation of a hash map using
 # separate chaining through a Singly Linked List.
 
-
-from hashmap_helper import (DynamicArray, LinkedList,
-                            hash_function_1, hash_function_2)
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bloom_filter import BLOOM_FILTERS, make_bloom_filter
+from hash_functions import mixed_hash, resolve_hash_function
+from hash_map_snapshot import load_separate_chaining, save_separate_chaining
+from hashmap_helper import (CAPACITY_POLICIES, DynamicArray, LinkedList,
+                            MapStats, SLNode, SortedBucket, batch_hash,
+                            bump_histogram, hash_function_1, hash_function_2,
+                            np, power_of_two_at_least, prime_at_least,
+                            summarize_histogram)
+
+# How get and contains_key reorder a chain when they find a key:
+#
+#     insertion      never, chains stay in insertion order (newest first)
+#     move_to_front  the key's node moves to the head of its chain
+#     transpose      the key's node swaps places with the node before it
+CHAIN_ORDERS = ('insertion', 'move_to_front', 'transpose')
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 stats: bool = False,
+                 incremental_resize: bool = False,
+                 resize_step: int = 4,
+                 capacity_policy: str = 'prime',
+                 clock: callable = time.monotonic,
+                 sweep_step: int = 4,
+                 treeify_threshold: int = 8,
+                 chain_order: str = 'insertion',
+                 bloom: str = None,
+                 bloom_bits_per_key: int = 10) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        function may be a hash function or its name in HASH_FUNCTIONS
+        stats=True collects resize counters, see get_stats()
+        incremental_resize=True grows the table by migrating resize_step
+        buckets of the old table on each later operation instead of
+        rehashing everything inside a single put
+        capacity_policy='power_of_two' keeps the capacity a power of two,
+        with hashes mixed by fmix64 so the low bits that pick the bucket
+        are well distributed
+        clock gives the current time for keys put with a ttl, and each
+        such put also removes up to sweep_step expired keys, see sweep()
+        A chain longer than treeify_threshold nodes becomes a SortedBucket
+        searched by bisection, and goes back to a LinkedList once removals
+        leave it under half that; None keeps every chain a LinkedList
+        chain_order is one of CHAIN_ORDERS; the self-organizing orders
+        keep frequently read keys near the front of their chains
+        bloom, one of BLOOM_FILTERS, keeps a Bloom filter of the keys with
+        bloom_bits_per_key bits for each key the table can hold, so get
+        and contains_key answer most absent keys without walking a chain;
+        use 'counting' if keys are removed often, since a standard filter
+        only forgets removed keys when the table is rebuilt
         """
+        if resize_step < 1:
+            raise ValueError("resize_step must be at least 1")
+        if capacity_policy not in CAPACITY_POLICIES:
+            raise ValueError(
+                f"capacity_policy must be one of {CAPACITY_POLICIES}")
+        if treeify_threshold is not None and treeify_threshold < 2:
+            raise ValueError("treeify_threshold must be at least 2")
+        if chain_order not in CHAIN_ORDERS:
+            raise ValueError(f"chain_order must be one of {CHAIN_ORDERS}")
+        if bloom is not None and bloom not in BLOOM_FILTERS:
+            raise ValueError(f"bloom must be None or one of {BLOOM_FILTERS}")
+
         self._buckets = DynamicArray()
+        self._power_of_two = capacity_policy == 'power_of_two'
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number (or a power of two)
+        if self._power_of_two:
+            self._capacity = power_of_two_at_least(capacity)
+        else:
+            self._capacity = prime_at_least(capacity)
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        self._hash_function = resolve_hash_function(function)
+        if self._power_of_two:
+            self._hash_function = mixed_hash(self._hash_function)
         self._size = 0
+        self._stats = MapStats() if stats else None
+
+        # Old table still being migrated by an incremental resize
+        self._incremental = incremental_resize
+        self._resize_step = resize_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        # Min-heap of (expiry time, order, key, hash) for keys put with a
+        # ttl. Entries for keys that were since removed or put again are
+        # skipped when they come up
+        self._clock = clock
+        self._sweep_step = sweep_step
+        self._expiry_heap = []
+        self._expiry_order = 0
+
+        # Chains that poor hashing made long are kept sorted by (hash, key)
+        self._treeify_threshold = treeify_threshold
+        self._chain_order = chain_order
+
+        # Bumped whenever nodes are added or removed, so the iterators can
+        # tell the map changed under them
+        self._version = 0
+
+        # Filter of the keys in the map, and of those in the new table
+        # while an incremental resize is running
+        self._bloom_kind = bloom
+        self._bloom_bits_per_key = bloom_bits_per_key
+        self._bloom = None
+        self._next_bloom = None
+        self._bloom = self._new_bloom(self._capacity)
 
     def __str__(self) -> str:
         """
@@ -89,31 +185,110 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Takes in a key and a value and places it in the hash map
+        With a ttl the key expires that many seconds (of the map's clock)
+        later, after which get and contains_key treat it as absent
+        """
+        hash, node = self._prepare_put(key)
+        if node is None:
+            # Inserts the key into the LL and increments the size
+            node = self._insert(hash % self._capacity, key, value, hash)
+            self._size += 1
+            self._bloom_add(hash)
+        else:
+            node.value = value      # Updates the value of the key
+
+        node.expires = None
+        if ttl is not None:
+            node.expires = self._clock() + ttl
+            self._schedule_expiry(key, hash, node.expires)
+
+        if self._expiry_heap:
+            self.sweep(self._sweep_step)
+        return
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Takes in a key and adds amount to its value, starting from 0 if
+        the key doesn't exist
+        Returns:
+            the new value
+        Same as get followed by put, but the key is hashed and looked up
+        only once
+        """
+        hash, node = self._prepare_put(key)
+        if node is not None:
+            node.value += amount
+            return node.value
+
+        self._insert(hash % self._capacity, key, amount, hash)
+        self._size += 1
+        self._bloom_add(hash)
+        return amount
+
+    def _prepare_put(self, key: str) -> tuple:
+        """
+        Does the work every put starts with: resizes the table if
+        necessary, then hashes the key and looks it up
+        Returns:
+            (hash, node) - the key's hash and the node already holding the
+            key, or None if the key doesn't exist yet
         """
         # Checks table load and resizes if necessary
         if self.table_load() >= 1:
-            new_capacity = self._capacity * 2
-            while not self._is_prime(new_capacity):
-                new_capacity = self._next_prime(new_capacity)
-            self.resize_table(new_capacity)
+            if self._incremental:
+                self._start_migration(self._grow_capacity(self._capacity))
+            else:
+                self.resize_table(self._grow_capacity(self._capacity))
 
-        bucket = self._buckets
         hash = self._hash_function(key)
-        index = hash % self._capacity
 
         # Checks if the key already exists
-        if bucket[index].length() > 0:
-            for x in bucket[index]:
-                if x.key == key:
-                    x.value = value     # Updates the value of the key
-                    return
-
-        bucket[index].insert(key, value)    # Inserts the key into the LL
-        self._size += 1                     # Increments the size
-        return
+        return hash, self._find_node(key, hash)
+
+    def _insert(self, index: int, key: str, value: object,
+                hash: int) -> SLNode:
+        """
+        Inserts a new node into bucket index and returns the node
+        Freshly allocated tables share one empty LinkedList between all
+        their buckets, so an empty bucket is swapped for its own list
+        before anything is inserted into it
+        A LinkedList that grows past treeify_threshold nodes is replaced
+        by a SortedBucket of the same nodes
+        """
+        bucket = self._buckets[index]
+        if bucket.length() == 0:
+            bucket = LinkedList()
+            self._buckets[index] = bucket
+        node = bucket.insert(key, value, hash)
+        self._version += 1
+
+        if (self._treeify_threshold is not None
+                and bucket.length() > self._treeify_threshold
+                and isinstance(bucket, LinkedList)):
+            self._buckets[index] = SortedBucket(bucket)
+        return node
+
+    def _untreeify(self, index: int) -> None:
+        """
+        Turns bucket index back into a LinkedList if it is a SortedBucket
+        that has shrunk under half of treeify_threshold
+        """
+        bucket = self._buckets[index]
+        if (isinstance(bucket, SortedBucket)
+                and bucket.length() < self._treeify_threshold // 2):
+            self._buckets[index] = bucket.to_linked_list()
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a bucket array of capacity empty buckets
+        All of them start out as the same empty LinkedList, which makes
+        allocating a large table a single list copy (see _insert)
+        """
+        return DynamicArray([LinkedList()] * capacity)
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -123,20 +298,80 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        old_buckets = self.get_keys_and_values()
-        new_map = DynamicArray()
-        for num in range(new_capacity):
-            new_map.append(LinkedList())
+        if self._power_of_two:
+            new_capacity = power_of_two_at_least(new_capacity)
 
-        self._buckets = new_map
-        self._capacity = new_capacity
-        self._size = 0
+        self._rehash(new_capacity)
+        return
 
-        # Places the old hash values in the new map
-        for num in range(old_buckets.length()):
-            self.put(old_buckets[num][0], old_buckets[num][1])
+    def _grow_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity a table of the given capacity grows to: the
+        first prime at or above double that capacity, or just double it
+        for a power-of-two table
+        """
+        if self._power_of_two:
+            return capacity * 2
+        return prime_at_least(capacity * 2)
 
-        return
+    def _reserve(self, expected_size: int) -> None:
+        """
+        Grows the table once, up front, so that expected_size entries fit
+        without put triggering any further resizes
+        """
+        new_capacity = self._capacity
+        while (expected_size - 1) / new_capacity >= 1:
+            new_capacity = self._grow_capacity(new_capacity)
+
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every node into a fresh table of new_capacity
+        Nodes are placed by their cached hash, so the hash function is
+        never called and no key comparisons are needed
+        """
+        self._finish_migration()
+        old_buckets = self._buckets
+        if self._stats is not None:
+            self._stats.resizes += 1
+
+        self._buckets = self._new_buckets(new_capacity)
+        self._capacity = new_capacity
+        self._size = 0
+        self._bloom = self._new_bloom(new_capacity)
+
+        # Streams the old nodes into the new map; expired nodes are dropped
+        for node in self._nodes_in(old_buckets, self._now()):
+            # Grows the same way put would if the table fills up mid-rehash
+            if self.table_load() >= 1:
+                self._rehash(self._grow_capacity(self._capacity))
+            index = node.hash % self._capacity
+            self._insert(index, node.key, node.value,
+                         node.hash).expires = node.expires
+            self._size += 1
+            if self._bloom is not None:
+                self._bloom.add(node.hash)
+            if self._stats is not None:
+                self._stats.rehashed_entries += 1
+
+    def _nodes_in(self, buckets: DynamicArray, now: float):
+        """
+        Yields every unexpired node of a table in bucket order, skipping
+        empty buckets without walking them
+        """
+        for n in range(buckets.length()):
+            bucket = buckets[n]
+            if bucket.length() == 0:
+                continue
+
+            # Reads reorder self-organizing chains, so those are copied
+            if self._chain_order != 'insertion':
+                bucket = list(bucket)
+            for node in bucket:
+                if now is None or not self._expired(node, now):
+                    yield node
 
     def table_load(self) -> float:
         """
@@ -149,6 +384,7 @@ class HashMap:
         """
         Returns an integer representing the number of empty buckets
         """
+        self._finish_migration()
         bucket_counter = 0
         for bucket in range(self._capacity):
             if self._buckets[bucket].length() == 0:
@@ -162,15 +398,11 @@ class HashMap:
             value: value located at the key if it exists
             None: If the key does not exist
         """
-        key_to_get = self._hash_function(key) % self._capacity
+        node = self._find_node(key, self._hash_function(key), reorder=True)
 
-        if self._buckets[key_to_get] is not None:
-            for x in self._buckets[key_to_get]:
-                if x.key == key:
-                    value_at_key = x.value
-                    return value_at_key
-        else:
-            return
+        if node is not None:
+            return node.value
+        return
 
     def contains_key(self, key: str) -> bool:
         """
@@ -179,8 +411,7 @@ class HashMap:
             True: If the key exists in the map
             False: If the key does not exist in the map
         """
-        key_to_get = self._hash_function(key) % self._capacity
-        if self._buckets[key_to_get].contains(key):
+        if self._find_node(key, self._hash_function(key), reorder=True):
             return True
         else:
             return False
@@ -189,13 +420,417 @@ class HashMap:
         """
         Takes in a key and removes the key if it exists else it does nothing
         """
-        key_to_remove = self._hash_function(key) % self._capacity
-        for x in self._buckets[key_to_remove]:
-            if x.key == key:
-                self._buckets[key_to_remove].remove(key)
-                self._size -= 1
+        hash = self._hash_function(key)
+
+        old_bucket = self._old_bucket(hash)
+        if old_bucket is not None and old_bucket.remove(key, hash):
+            self._size -= 1
+            self._version += 1
+            self._bloom_remove(hash, old_table=True)
+            return
+
+        index = hash % self._capacity
+        if self._buckets[index].remove(key, hash):
+            self._size -= 1
+            self._version += 1
+            self._untreeify(index)
+            self._bloom_remove(hash)
         return
 
+    def _find_node(self, key: str, hash: int,
+                   reorder: bool = False) -> SLNode:
+        """
+        Returns the node holding the key, looking in the old table too
+        while an incremental resize is running, or None if it doesn't exist
+        reorder=True lets a hit reorder its chain as chain_order says
+        (sorted buckets and the old table are never reordered)
+        """
+        now = self._now()
+
+        old_bucket = self._old_bucket(hash)
+
+        # Keys the filter rejects were never put (or were removed)
+        if self._bloom is not None and not self._bloom.might_contain(hash):
+            return None
+
+        if old_bucket is not None:
+            node = old_bucket.contains(key, hash)
+            if node is not None:
+                return self._reclaim(old_bucket, node, now, old_table=True)
+
+        bucket = self._buckets[hash % self._capacity]
+        if (reorder and isinstance(bucket, LinkedList)
+                and self._chain_order == 'move_to_front'):
+            node = bucket.move_to_front(key, hash)
+        elif (reorder and isinstance(bucket, LinkedList)
+                and self._chain_order == 'transpose'):
+            node = bucket.transpose(key, hash)
+        else:
+            node = bucket.contains(key, hash)
+
+        if node is None and self._bloom is not None:
+            self._bloom.record_false_positive()
+        return self._reclaim(bucket, node, now)
+
+    def _now(self) -> float:
+        """
+        Returns the clock's time if any key was put with a ttl, otherwise
+        None so maps without expiring keys never read the clock
+        """
+        if self._expiry_order:
+            return self._clock()
+        return None
+
+    @staticmethod
+    def _expired(node: SLNode, now: float) -> bool:
+        """
+        Returns True if the node's key has expired by now
+        """
+        return node.expires is not None and node.expires <= now
+
+    def _reclaim(self, bucket: LinkedList, node: SLNode, now: float,
+                 old_table: bool = False) -> SLNode:
+        """
+        Takes in a bucket and the node a lookup found in it (or None)
+        Removes the node if its key has expired by now, so only the node a
+        lookup hits is ever reclaimed and the rest is left to sweep
+        old_table says the bucket belongs to the table being migrated
+        Returns the node, or None if there was none or it was removed
+        """
+        if node is None or now is None or not self._expired(node, now):
+            return node
+
+        bucket.remove(node.key, node.hash)
+        self._size -= 1
+        self._version += 1
+        self._bloom_remove(node.hash, old_table)
+        return None
+
+    def _schedule_expiry(self, key: str, hash: int, expires: float) -> None:
+        """
+        Records when the key expires so sweep can find it
+        """
+        self._expiry_order += 1
+        heapq.heappush(self._expiry_heap,
+                       (expires, self._expiry_order, key, hash))
+
+    def sweep(self, limit: int = 64) -> int:
+        """
+        Takes in the most scheduled expiries to look at
+        Removes expired keys, the earliest expiry first, without scanning
+        the table. Expiries of keys that were removed or put again since
+        count towards limit but remove nothing
+        Returns:
+            int - the number of keys removed
+        """
+        size = self._size
+        now = self._clock()
+
+        while self._expiry_heap and limit > 0:
+            expires, _, key, hash = self._expiry_heap[0]
+            if expires > now:
+                break
+            heapq.heappop(self._expiry_heap)
+            limit -= 1
+
+            # Found directly, so sweeping doesn't count as Bloom lookups
+            old_bucket = self._old_bucket(hash)
+            if old_bucket is not None:
+                self._reclaim(old_bucket, old_bucket.contains(key, hash),
+                              now, old_table=True)
+            bucket = self._buckets[hash % self._capacity]
+            self._reclaim(bucket, bucket.contains(key, hash), now)
+
+        return size - self._size
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Advances a running incremental resize by one step and returns the
+        old table's bucket for hash if it hasn't been migrated yet,
+        otherwise None
+        """
+        if self._old_buckets is None:
+            return None
+
+        self._migrate_step(self._resize_step)
+        if self._old_buckets is None:
+            return None
+
+        index = hash % self._old_capacity
+        if index < self._migrate_index:
+            return None
+        return self._old_buckets[index]
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begins an incremental resize: the current table becomes the old
+        table and new keys go into a fresh table of new_capacity
+        """
+        self._finish_migration()
+        if self._stats is not None:
+            self._stats.resizes += 1
+        self._version += 1
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+
+        self._buckets = self._new_buckets(new_capacity)
+        self._capacity = new_capacity
+        self._next_bloom = self._new_bloom(new_capacity)
+
+    def _migrate_step(self, limit: int) -> None:
+        """
+        Moves the nodes of up to limit buckets of the old table into the
+        new one
+        """
+        end = min(self._migrate_index + limit, self._old_capacity)
+
+        for index in range(self._migrate_index, end):
+            bucket = self._old_buckets[index]
+            if bucket.length() == 0:
+                continue
+
+            for node in bucket:
+                self._insert(node.hash % self._capacity, node.key,
+                             node.value, node.hash).expires = node.expires
+                if self._next_bloom is not None:
+                    self._next_bloom.add(node.hash)
+            if self._stats is not None:
+                self._stats.rehashed_entries += bucket.length()
+
+            # Drops the migrated nodes from the old table
+            self._old_buckets[index] = LinkedList()
+
+        self._migrate_index = end
+        if end == self._old_capacity:
+            self._old_buckets = None
+            if self._next_bloom is not None:
+                self._next_bloom.inherit_stats(self._bloom)
+                self._bloom = self._next_bloom
+                self._next_bloom = None
+
+    def _finish_migration(self) -> None:
+        """
+        Completes a running incremental resize, if there is one
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._old_capacity)
+
+    def _new_bloom(self, capacity: int):
+        """
+        Returns an empty Bloom filter sized for a table of capacity, which
+        keeps the lookup counters of the current filter, or None if the
+        map has no filter
+        """
+        if self._bloom_kind is None:
+            return None
+
+        # The table is resized once it holds as many keys as buckets
+        bloom = make_bloom_filter(self._bloom_kind, capacity,
+                                  self._bloom_bits_per_key)
+        if self._bloom is not None:
+            bloom.inherit_stats(self._bloom)
+        return bloom
+
+    def _bloom_add(self, hash: int) -> None:
+        """
+        Records a newly put key in the filter, and in the new table's
+        filter while an incremental resize is running
+        """
+        if self._bloom is not None:
+            self._bloom.add(hash)
+            if self._next_bloom is not None:
+                self._next_bloom.add(hash)
+
+    def _bloom_remove(self, hash: int, old_table: bool = False) -> None:
+        """
+        Forgets a removed key in the filter, and in the new table's filter
+        too unless the key was still in the old table
+        """
+        if self._bloom is not None:
+            self._bloom.remove(hash)
+            if self._next_bloom is not None and not old_table:
+                self._next_bloom.remove(hash)
+
+    def _group_by_bucket(self, hashes: list) -> list:
+        """
+        Takes in a list of hashes
+        Returns:
+            list of (bucket index, positions) pairs, with the positions of
+            each bucket kept in input order
+        """
+        indices = [hash % self._capacity for hash in hashes]
+        order = sorted(range(len(indices)), key=indices.__getitem__)
+
+        groups = []
+        for pos in order:
+            index = indices[pos]
+            if groups and groups[-1][0] == index:
+                groups[-1][1].append(pos)
+            else:
+                groups.append((index, [pos]))
+        return groups
+
+    def put_many(self, items) -> None:
+        """
+        Takes in an iterable of (key, value) pairs and places them all in
+        the hash map
+        Keys are hashed in one batch, the table is grown at most once and
+        each bucket is visited once for all of its keys
+        """
+        items = list(items)
+        if not items:
+            return
+
+        self._finish_migration()
+        hashes = batch_hash(self._hash_function, [key for key, _ in items])
+        self._reserve(self._size + len(items))
+
+        now = self._now()
+        for index, positions in self._group_by_bucket(hashes):
+            for pos in positions:
+                key, value = items[pos]
+                bucket = self._buckets[index]
+                node = self._reclaim(bucket, bucket.contains(key, hashes[pos]),
+                                     now)
+                if node is not None:
+                    node.value = value
+                    node.expires = None
+                else:
+                    self._insert(index, key, value, hashes[pos])
+                    self._size += 1
+                    self._bloom_add(hashes[pos])
+
+    def get_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns:
+            list - value for each key in input order, None where the key
+            does not exist
+        """
+        keys = list(keys)
+        self._finish_migration()
+        hashes = batch_hash(self._hash_function, keys)
+
+        values = [None] * len(keys)
+        now = self._now()
+        for index, positions in self._group_by_bucket(hashes):
+            bucket = self._buckets[index]
+            for pos in positions:
+                node = self._reclaim(bucket, self._bucket_lookup(
+                    bucket, keys[pos], hashes[pos]), now)
+                if node is not None:
+                    values[pos] = node.value
+        return values
+
+    def contains_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns:
+            list - True/False for each key in input order
+        """
+        keys = list(keys)
+        self._finish_migration()
+        hashes = batch_hash(self._hash_function, keys)
+
+        found = [False] * len(keys)
+        now = self._now()
+        for index, positions in self._group_by_bucket(hashes):
+            bucket = self._buckets[index]
+            for pos in positions:
+                found[pos] = self._reclaim(bucket, self._bucket_lookup(
+                    bucket, keys[pos], hashes[pos]), now) is not None
+        return found
+
+    def _bucket_lookup(self, bucket: LinkedList, key: str,
+                       hash: int) -> SLNode:
+        """
+        Returns the node holding the key in bucket, or None if it doesn't
+        exist, asking the Bloom filter first if the map has one
+        """
+        if self._bloom is None:
+            return bucket.contains(key, hash)
+        if not self._bloom.might_contain(hash):
+            return None
+
+        node = bucket.contains(key, hash)
+        if node is None:
+            self._bloom.record_false_positive()
+        return node
+
+    def remove_many(self, keys) -> None:
+        """
+        Takes in an iterable of keys and removes each one that exists
+        """
+        keys = list(keys)
+        self._finish_migration()
+        hashes = batch_hash(self._hash_function, keys)
+
+        for index, positions in self._group_by_bucket(hashes):
+            bucket = self._buckets[index]
+            for pos in positions:
+                if bucket.remove(keys[pos], hashes[pos]):
+                    self._size -= 1
+                    self._version += 1
+                    self._bloom_remove(hashes[pos])
+            self._untreeify(index)
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary of statistics for a map created with
+        stats=True: the chain-length distribution (chain_lengths[n] is the
+        number of buckets holding n nodes) and resize/rehash counters,
+        plus the Bloom filter's fill and false-positive rates under
+        'bloom' if the map has one
+        Raises ValueError if stats were not enabled
+        """
+        if self._stats is None:
+            raise ValueError("stats were not enabled for this HashMap")
+
+        self._finish_migration()
+        chain_lengths = []
+        for n in range(self._buckets.length()):
+            bump_histogram(chain_lengths, self._buckets[n].length())
+
+        stats = self._stats.as_dict(probes=False)
+        stats['chain_lengths'] = summarize_histogram(chain_lengths)
+        stats['size'] = self._size
+        stats['capacity'] = self._capacity
+        stats['load'] = self.table_load()
+        stats['empty_buckets'] = chain_lengths[0] if chain_lengths else 0
+        if self._bloom is not None:
+            stats['bloom'] = self._bloom.get_stats()
+        return stats
+
+    def reset_stats(self) -> None:
+        """
+        Zeroes the collected statistics, if stats are enabled
+        """
+        if self._stats is not None:
+            self._stats = MapStats()
+        if self._bloom is not None:
+            self._bloom.reset_stats()
+
+    def save(self, path: str) -> None:
+        """
+        Takes in a file path and writes a binary snapshot of the hash map
+        to it, see hash_map_snapshot
+        """
+        save_separate_chaining(self, path)
+
+    @classmethod
+    def load(cls, path: str, function=None) -> "HashMap":
+        """
+        Takes in the path of a snapshot written by save and the hash
+        function (None to use the one named in the snapshot)
+        Returns:
+            HashMap - the saved map, rebuilt without rehashing any key
+        The values are unpickled, so only load snapshots from a trusted
+        source
+        """
+        return load_separate_chaining(cls, path, function)
+
     def get_keys_and_values(self) -> DynamicArray:
         """
         Iterates through the hash map and grabs all the keys and values
@@ -203,22 +838,61 @@ class HashMap:
             DynamicArray - filled with (key, value) tuples
         """
         new_da = DynamicArray()
-        buckets = self._buckets
-        for n in range(self._buckets.length()):
-            if self._buckets[n].length() >= 1:
-                for x in buckets[n]:
-                    tup = (x.key, x.value)
-                    new_da.append(tup)
+        for tup in self.items():
+            new_da.append(tup)
         return new_da
 
+    def _entries(self):
+        """
+        Yields every node in bucket order
+        Raises RuntimeError if the map is changed in between
+        """
+        self._finish_migration()
+        version = self._version
+        for node in self._nodes_in(self._buckets, self._now()):
+            yield node
+            if self._version != version:
+                raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Returns a new iterator over the keys, which reads the table as it
+        goes instead of copying it
+        """
+        return (node.key for node in self._entries())
+
+    def values(self):
+        """
+        Returns a new iterator over the values
+        """
+        return (node.value for node in self._entries())
+
+    def items(self):
+        """
+        Returns a new iterator over the (key, value) tuples
+        """
+        return ((node.key, node.value) for node in self._entries())
+
+    def __iter__(self):
+        """
+        Returns a new iterator over the nodes (SLNode objects)
+        """
+        return self._entries()
+
     def clear(self) -> None:
         """
         Iterates the hash map and sets each value to an empty LinkedList
         """
+        self._old_buckets = None
         for x in range(self._buckets.length()):
             if self._buckets[x].length() != 0:
                 self._buckets[x] = LinkedList()
         self._size = 0
+        self._expiry_heap = []
+        self._expiry_order = 0
+        self._version += 1
+        self._next_bloom = None
+        self._bloom = self._new_bloom(self._capacity)
         return
 
 
@@ -233,30 +907,100 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     map = HashMap()
 
     max_num = 0
-    number = 1
 
     for num in range(da.length()):
-        # Checks if the map contains the value and adds 1 to its frequency
-        if map.contains_key(da[num]):
-            current_frequency = map.get(da[num])
-            number = current_frequency + 1
-
-        # Places the value in the map or updates the frequency
-        map.put(da[num], number)
+        # Places the value in the map or adds 1 to its frequency
+        number = map.increment(da[num])
         if number > max_num:
             max_num = number
 
-        number = 1      # Resets the number (counter) to 1
+    return _modes(map, max_num), max_num
+
 
+def _modes(map: HashMap, max_num: int) -> DynamicArray:
+    """
+    Takes in a map of frequencies and the highest frequency
+    Returns:
+        a DynamicArray of the keys that have that frequency, in the map's
+        bucket order
+    """
     new_da = DynamicArray()
-    buckets = map.get_keys_and_values()
 
     # Appends keys that have a matching value to the max_num
-    for num in range(buckets.length()):
-        if buckets[num][1] == max_num:
-            new_da.append(buckets[num][0])
+    for key, count in map.items():
+        if count == max_num:
+            new_da.append(key)
 
-    return new_da, max_num
+    return new_da
+
+
+def _count_chunk(values: list) -> list:
+    """
+    Takes in a list of values
+    Returns:
+        a list of (value, frequency, index of first occurrence) tuples,
+        one per distinct value, in order of first occurrence
+    Runs in the worker processes of find_mode_parallel
+    """
+    map = HashMap()
+    first = []
+
+    for num in range(len(values)):
+        if map.increment(values[num]) == 1:
+            first.append(num)
+
+    return [(values[num], map.get(values[num]), num) for num in first]
+
+
+def find_mode_parallel(values, workers: int = None,
+                       min_chunk: int = 50000) -> tuple[DynamicArray, int]:
+    """
+    Takes in a DynamicArray, list, NumPy array or any other iterable of
+    values
+    Returns:
+        the same tuple as find_mode, with the keys in the same order
+    The values are split into chunks that are counted in a pool of worker
+    processes (os.cpu_count() of them by default). Inputs too small to
+    give every chunk min_chunk values are counted in this process instead
+    """
+    if isinstance(values, DynamicArray):
+        values = [values[num] for num in range(values.length())]
+    elif np is not None and isinstance(values, np.ndarray):
+        values = values.tolist()
+    else:
+        values = list(values)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = min(workers * 4, len(values) // min_chunk)
+    if workers == 1 or chunks < 2:
+        return find_mode(DynamicArray(values))
+
+    size = -(-len(values) // chunks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        counted = list(pool.map(_count_chunk,
+                                [values[start:start + size]
+                                 for start in range(0, len(values), size)]))
+
+    # Merging chunk by chunk inserts every key in order of its first
+    # occurrence, which lays the map out exactly as find_mode's would be
+    map = HashMap()
+    max_num = 0
+    last_new = -1
+
+    for chunk in range(len(counted)):
+        for value, frequency, num in counted[chunk]:
+            number = map.increment(value, frequency)
+            if number == frequency:
+                last_new = chunk * size + num
+            if number > max_num:
+                max_num = number
+
+    # find_mode ends with a put for every repeat after the last new key,
+    # and the first of those puts can still grow the table
+    if last_new < len(values) - 1:
+        map.increment(values[-1], 0)
+
+    return _modes(map, max_num), max_num
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -0,0 +1,377 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Thread-safe variant of the separate chaining hash map. The
+# buckets are split into stripes, each guarded by its own lock, so writers
+# to different stripes never wait on each other. Resizing takes every
+# stripe lock. Reads take no lock at all: a chain is only ever changed by
+# swapping a single reference (a node's next, a list's head or the bucket
+# array itself), so a reader walking it always sees a complete chain.
+
+import threading
+
+from hash_functions import resolve_hash_function
+from hashmap_helper import (DynamicArray, LinkedList, SLNode,
+                            hash_function_1, prime_at_least)
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 concurrency: int = 16) -> None:
+        """
+        Initialize new thread-safe HashMap that uses
+        separate chaining for collision resolution
+        function may be a hash function or its name in HASH_FUNCTIONS
+        concurrency is the number of lock stripes, roughly the number of
+        threads that can write at the same time
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        # capacity must be a prime number
+        self._buckets = self._new_buckets(prime_at_least(capacity))
+        self._hash_function = resolve_hash_function(function)
+
+        # Bucket index i is guarded by _locks[i % concurrency], and the
+        # number of keys in those buckets is kept in _counts[i % concurrency]
+        self._locks = [threading.Lock() for _ in range(concurrency)]
+        self._counts = [0] * concurrency
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        buckets = self._buckets
+        out = ''
+        for i in range(buckets.length()):
+            out += str(i) + ': ' + str(buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        Writers running at the same time may or may not be counted
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._buckets.length()
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns a bucket array of capacity empty buckets
+        """
+        return DynamicArray([LinkedList() for _ in range(capacity)])
+
+    def _lock_bucket(self, hash: int) -> tuple:
+        """
+        Acquires the stripe lock of the bucket for hash
+        Returns
+            (buckets, index, stripe) - The bucket array, the bucket index
+            and the stripe whose lock is now held
+        The bucket array is checked again once the lock is held, since a
+        resize may have replaced it while this thread was waiting
+        """
+        while True:
+            buckets = self._buckets
+            index = hash % buckets.length()
+            stripe = index % len(self._locks)
+            self._locks[stripe].acquire()
+            if buckets is self._buckets:
+                return buckets, index, stripe
+            self._locks[stripe].release()
+
+    def _lock_all(self) -> None:
+        """
+        Acquires every stripe lock, always in the same order
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Releases every stripe lock
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _grow_if_needed(self) -> None:
+        """
+        Grows the table to the first prime at or above double its capacity
+        once the table load reaches 1
+        """
+        capacity = self._buckets.length()
+        if self.get_size() < capacity:
+            return
+
+        self._lock_all()
+        try:
+            # Another writer may have grown the table while this one waited
+            if self._buckets.length() == capacity:
+                self._rehash(prime_at_least(capacity * 2))
+        finally:
+            self._unlock_all()
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Copies every node into a fresh table of new_capacity and publishes
+        it. Must be called with every stripe lock held
+        New nodes are created so readers still walking the old table see
+        its chains unchanged
+        """
+        old_buckets = self._buckets
+        buckets = self._new_buckets(new_capacity)
+        counts = [0] * len(self._locks)
+
+        for n in range(old_buckets.length()):
+            for node in old_buckets[n]:
+                index = node.hash % new_capacity
+                buckets[index].insert(node.key, node.value, node.hash)
+                counts[index % len(counts)] += 1
+
+        self._buckets = buckets
+        self._counts = counts
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and places it in the hash map
+        """
+        hash = self._hash_function(key)
+        self._grow_if_needed()
+
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            node = buckets[index].contains(key, hash)
+            if node is not None:
+                node.value = value
+                return
+            buckets[index].insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+    def put_if_absent(self, key: str, value: object) -> object:
+        """
+        Takes in a key and a value and places it in the hash map only if
+        the key doesn't exist yet, as one atomic step
+        Returns
+            Value - The value already stored at the key
+            None - The key was absent and value has been stored
+        """
+        hash = self._hash_function(key)
+        self._grow_if_needed()
+
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            node = buckets[index].contains(key, hash)
+            if node is not None:
+                return node.value
+            buckets[index].insert(key, value, hash)
+            self._counts[stripe] += 1
+            return None
+        finally:
+            self._locks[stripe].release()
+
+    def compute(self, key: str, function) -> object:
+        """
+        Takes in a key and a function of the key's current value (None if
+        the key doesn't exist) and stores what the function returns, as
+        one atomic step. Returning None removes the key
+        Returns
+            The new value
+        The function runs while the stripe lock is held, so it should be
+        short and must not use this map
+        """
+        hash = self._hash_function(key)
+        self._grow_if_needed()
+
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            bucket = buckets[index]
+            node = bucket.contains(key, hash)
+            value = function(None if node is None else node.value)
+
+            if value is None:
+                if node is not None:
+                    bucket.remove(key, hash)
+                    self._counts[stripe] -= 1
+            elif node is not None:
+                node.value = value
+            else:
+                bucket.insert(key, value, hash)
+                self._counts[stripe] += 1
+            return value
+        finally:
+            self._locks[stripe].release()
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Takes in a key and adds amount to its value, starting from 0 if
+        the key doesn't exist, as one atomic step
+        Returns
+            The new value
+        """
+        return self.compute(
+            key, lambda value: amount if value is None else value + amount)
+
+    def table_load(self) -> float:
+        """
+        Returns a float value representing the table load
+        """
+        return float(self.get_size() / self.get_capacity())
+
+    def empty_buckets(self) -> int:
+        """
+        Returns an integer representing the number of empty buckets
+        """
+        buckets = self._buckets
+        bucket_counter = 0
+        for bucket in range(buckets.length()):
+            if buckets[bucket].length() == 0:
+                bucket_counter += 1
+        return bucket_counter
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Takes in a new capacity (as an integer) and resizes the hash
+        map to that capacity
+        """
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            self._rehash(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            value: value located at the key if it exists
+            None: If the key does not exist
+        Takes no lock
+        """
+        node = self._find_node(key, self._hash_function(key))
+        if node is not None:
+            return node.value
+        return
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True: If the key exists in the map
+            False: If the key does not exist in the map
+        Takes no lock
+        """
+        return self._find_node(key, self._hash_function(key)) is not None
+
+    def _find_node(self, key: str, hash: int) -> SLNode:
+        """
+        Returns the node holding the key, or None if it doesn't exist
+        Reads the bucket array once so a resize can't split the lookup
+        between two tables
+        """
+        buckets = self._buckets
+        return buckets[hash % buckets.length()].contains(key, hash)
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key and removes the key if it exists else it does nothing
+        """
+        hash = self._hash_function(key)
+
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            if buckets[index].remove(key, hash):
+                self._counts[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray of tuples containing (keys, values)
+        Holds every stripe lock, so the result is a consistent snapshot
+        """
+        new_da = DynamicArray()
+        self._lock_all()
+        try:
+            buckets = self._buckets
+            for n in range(buckets.length()):
+                for node in buckets[n]:
+                    new_da.append((node.key, node.value))
+        finally:
+            self._unlock_all()
+        return new_da
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing its capacity
+        """
+        self._lock_all()
+        try:
+            self._buckets = self._new_buckets(self._buckets.length())
+            self._counts = [0] * len(self._locks)
+        finally:
+            self._unlock_all()
+
+    def __iter__(self):
+        """
+        Returns an iterator over the nodes of the map
+        Takes no lock: keys put or removed during the iteration may or may
+        not be seen, but each one is seen at most once
+        """
+        buckets = self._buckets
+        for n in range(buckets.length()):
+            for node in buckets[n]:
+                yield node
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - get example 1")
+    print("-------------------")
+    m = HashMap(31, hash_function_1)
+    print(m.get('key'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+
+    print("\nput_if_absent / compute example")
+    print("-------------------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.put_if_absent('key1', 10), m.put_if_absent('key1', 20), m.get('key1'))
+    print(m.compute('key1', lambda value: value * 3), m.get('key1'))
+    print(m.compute('key1', lambda value: None), m.contains_key('key1'), m.get_size())
+
+    print("\nincrement from 8 threads example")
+    print("--------------------------------")
+    m = HashMap(11, hash_function_1)
+
+    def count_words(start: int) -> None:
+        for i in range(2000):
+            m.increment('word' + str((start + i) % 50))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(count_words, range(8)))
+    print(m.get_size(), m.get_capacity(), sum(node.value for node in m))
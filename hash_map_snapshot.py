@@ -0,0 +1,498 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Binary snapshots of the open addressing and separate chaining
+# hash maps. A snapshot keeps the table exactly as it is laid out in memory,
+# cached hashes included, so loading one never calls the hash function or
+# probes, and SnapshotView can answer get/contains_key straight from the
+# memory-mapped file without reading the rest of it.
+#
+# Layout (version 3, little-endian):
+#
+#     header   HEADER, then the hash function's name (UTF-8, may be empty)
+#     table    capacity slots, OA_SLOT or SC_BUCKET depending on the kind
+#     nodes    NODE followed by the UTF-8 key and the pickled value
+#
+# A key put with a ttl keeps its expiry in its node as wall-clock time
+# (time.time()), since the maps' own clock is monotonic and means nothing
+# to another process. Loading converts it back to the map's clock, so the
+# key still expires when it would have.
+#
+# An open addressing slot holds its state (empty, live or tombstone) and the
+# offset of its node, if it has one. A
+# separate chaining bucket holds the offset of its first node and the
+# length of its chain, whose nodes are stored back to back in chain order.
+#
+# Values are stored with pickle, and unpickling can run arbitrary code, so
+# only load or view snapshots from a trusted source (ones this program
+# wrote, kept where nobody else can change them).
+
+import math
+import mmap
+import os
+import pickle
+import struct
+import time
+
+from hash_functions import (hash_function_name, mixed_hash,
+                            resolve_hash_function)
+from hashmap_helper import DynamicArray, HashEntry, LinkedList, SortedBucket
+
+MAGIC = b'HMSNAP'
+FORMAT_VERSION = 3
+
+KIND_OPEN_ADDRESSING = 0
+KIND_SEPARATE_CHAINING = 1
+
+# magic, version, kind, robin hood, power of two, capacity, size,
+# tombstones, hash function name length
+HEADER = struct.Struct('<6sHBBBxQQQH')
+
+# state, node offset
+OA_SLOT = struct.Struct('<BQ')
+SLOT_EMPTY = 0
+SLOT_LIVE = 1
+SLOT_TOMBSTONE = 2
+
+# first node offset, chain length
+SC_BUCKET = struct.Struct('<QI')
+
+# hash, key length, value length, wall-clock expiry (inf if none)
+NODE = struct.Struct('<QIId')
+NO_EXPIRY = math.inf
+
+HASH_LIMIT = 1 << 64
+
+
+def _pack_node(key: str, value: object, hash: int,
+               expiry: float = NO_EXPIRY) -> bytes:
+    """
+    Returns the node record of one entry, expiring at the wall-clock time
+    expiry
+    """
+    if not 0 <= hash < HASH_LIMIT:
+        raise ValueError("snapshots need hashes in the unsigned 64-bit range")
+    key_bytes = key.encode('utf-8')
+    value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return (NODE.pack(hash, len(key_bytes), len(value_bytes), expiry)
+            + key_bytes + value_bytes)
+
+
+def _clock_offset(map) -> float:
+    """
+    Returns what to add to a time on the map's clock to get wall-clock
+    time
+    """
+    return time.time() - map._clock()
+
+
+def _wall_expiry(expires: float, offset: float) -> float:
+    """
+    Returns the wall-clock expiry of an entry expiring at expires on the
+    map's clock, or NO_EXPIRY if expires is None
+    """
+    return NO_EXPIRY if expires is None else expires + offset
+
+
+def _restore_expiry(map, entry, expiry: float, offset: float) -> None:
+    """
+    Sets the expiry of a loaded entry from its wall-clock expiry and
+    schedules it with the map, so sweep finds it
+    """
+    if expiry != NO_EXPIRY:
+        entry.expires = expiry - offset
+        map._schedule_expiry(entry.key, entry.hash, entry.expires)
+
+
+def _write(path: str, header: bytes, table_size: int, write_body) -> None:
+    """
+    Writes a snapshot file: the header, then write_body(file, nodes_start),
+    which writes the nodes and returns the table bytes to store in front of
+    them. The file is written next to path and renamed into place, so a
+    crash never leaves a half-written snapshot behind
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(header)
+        file.write(bytes(table_size))
+        table = write_body(file, len(header) + table_size)
+        file.seek(len(header))
+        file.write(table)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def _header(kind: int, map, tombstones: int) -> bytes:
+    """
+    Returns the header and hash function name of a snapshot of map
+    """
+    name = (hash_function_name(map._hash_function) or '').encode('utf-8')
+    return HEADER.pack(MAGIC, FORMAT_VERSION, kind,
+                       int(getattr(map, '_robin_hood', False)),
+                       int(map._power_of_two), map._capacity, map._size,
+                       tombstones, len(name)) + name
+
+
+def save_open_addressing(map, path: str) -> None:
+    """
+    Takes in an open addressing HashMap and writes its snapshot to path
+    """
+    map._finish_migration()
+    buckets = map._buckets
+    clock_offset = _clock_offset(map)
+
+    def write_body(file, offset: int) -> bytes:
+        table = bytearray()
+        for index in range(buckets.length()):
+            entry = buckets[index]
+            if entry is None:
+                table += OA_SLOT.pack(SLOT_EMPTY, 0)
+                continue
+
+            # Tombstones keep their node too, so the table prints the same
+            state = SLOT_TOMBSTONE if entry.is_tombstone else SLOT_LIVE
+            node = _pack_node(entry.key, entry.value, entry.hash,
+                              _wall_expiry(entry.expires, clock_offset))
+            table += OA_SLOT.pack(state, offset)
+            file.write(node)
+            offset += len(node)
+        return bytes(table)
+
+    _write(path, _header(KIND_OPEN_ADDRESSING, map, map._tombstones),
+           map._capacity * OA_SLOT.size, write_body)
+
+
+def save_separate_chaining(map, path: str) -> None:
+    """
+    Takes in a separate chaining HashMap and writes its snapshot to path
+    """
+    map._finish_migration()
+    buckets = map._buckets
+    clock_offset = _clock_offset(map)
+
+    def write_body(file, offset: int) -> bytes:
+        table = bytearray()
+        for index in range(buckets.length()):
+            bucket = buckets[index]
+            table += SC_BUCKET.pack(offset, bucket.length())
+            for node in bucket:
+                record = _pack_node(
+                    node.key, node.value, node.hash,
+                    _wall_expiry(node.expires, clock_offset))
+                file.write(record)
+                offset += len(record)
+        return bytes(table)
+
+    _write(path, _header(KIND_SEPARATE_CHAINING, map, 0),
+           map._capacity * SC_BUCKET.size, write_body)
+
+
+class _Snapshot:
+    """
+    Header fields and node reader of a snapshot held in a buffer
+    """
+
+    def __init__(self, buffer, path: str) -> None:
+        """
+        Takes in the snapshot's bytes and its path (for error messages)
+        Raises ValueError if the buffer isn't a supported snapshot
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError(f"{path} is not a HashMap snapshot")
+        (magic, version, self.kind, robin_hood, power_of_two, self.capacity,
+         self.size, self.tombstones, name_length) = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a HashMap snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} is snapshot version {version}, only "
+                             f"version {FORMAT_VERSION} is supported")
+
+        self.buffer = buffer
+        self.robin_hood = bool(robin_hood)
+        self.power_of_two = bool(power_of_two)
+        self.function_name = bytes(
+            buffer[HEADER.size:HEADER.size + name_length]).decode('utf-8')
+        self.table_start = HEADER.size + name_length
+
+    def hash_function(self, function, mixed: bool = True):
+        """
+        Takes in the hash function to use, or None for the one named in
+        the snapshot
+        Returns the function the map hashes keys with. mixed=False leaves
+        out the fmix64 wrapper of power-of-two and Robin Hood maps, which
+        the HashMap constructors add themselves
+        Raises ValueError if function isn't the one the snapshot was
+        saved with, since the cached hashes wouldn't match its keys
+        """
+        if function is None:
+            if not self.function_name:
+                raise ValueError("the snapshot's hash function isn't in "
+                                 "HASH_FUNCTIONS, pass it in explicitly")
+            function = self.function_name
+        function = resolve_hash_function(function)
+        if (self.function_name
+                and hash_function_name(function) != self.function_name):
+            raise ValueError(f"the snapshot was saved with hash function "
+                             f"{self.function_name}")
+        if (self.power_of_two or self.robin_hood) and mixed:
+            function = mixed_hash(function)
+        return function
+
+    def node(self, offset: int) -> tuple:
+        """
+        Returns (hash, key bytes start, key length, value length) of the
+        node at offset
+        """
+        hash, key_length, value_length, _ = NODE.unpack_from(self.buffer,
+                                                             offset)
+        return hash, offset + NODE.size, key_length, value_length
+
+    def expiry(self, offset: int) -> float:
+        """
+        Returns the wall-clock expiry of the node at offset, NO_EXPIRY if
+        its key was put without a ttl
+        """
+        return NODE.unpack_from(self.buffer, offset)[3]
+
+    def entry(self, offset: int) -> tuple:
+        """
+        Returns (key, value, hash) of the node at offset
+        """
+        hash, start, key_length, value_length = self.node(offset)
+        key = bytes(self.buffer[start:start + key_length]).decode('utf-8')
+        start += key_length
+        return key, pickle.loads(self.buffer[start:start + value_length]), hash
+
+
+def _read(path: str):
+    """
+    Returns the contents of the snapshot file at path
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def load_open_addressing(cls, path: str, function=None):
+    """
+    Takes in the open addressing HashMap class, a snapshot path and the
+    hash function (None to use the one named in the snapshot)
+    Returns a HashMap with every entry back in its saved slot
+    The values are unpickled, so path must be a trusted file
+    """
+    snapshot = _Snapshot(_read(path), path)
+    if snapshot.kind != KIND_OPEN_ADDRESSING:
+        raise ValueError(f"{path} is not an open addressing snapshot")
+
+    map = cls(1, snapshot.hash_function(function, mixed=False),
+              probing='robin_hood' if snapshot.robin_hood else 'quadratic',
+              capacity_policy=('power_of_two' if snapshot.power_of_two
+                               else 'prime'))
+    capacity = snapshot.capacity
+    clock_offset = _clock_offset(map)
+
+    slots = [None] * capacity
+    for index in range(capacity):
+        state, offset = OA_SLOT.unpack_from(
+            snapshot.buffer, snapshot.table_start + index * OA_SLOT.size)
+        if state != SLOT_EMPTY:
+            entry = HashEntry(*snapshot.entry(offset))
+            entry.is_tombstone = state == SLOT_TOMBSTONE
+            entry.probe_distance = (index - entry.hash) % capacity
+            if not entry.is_tombstone:
+                _restore_expiry(map, entry, snapshot.expiry(offset),
+                                clock_offset)
+            slots[index] = entry
+
+    map._buckets = DynamicArray(slots)
+    map._capacity = capacity
+    map._size = snapshot.size
+    map._tombstones = snapshot.tombstones
+    return map
+
+
+def load_separate_chaining(cls, path: str, function=None):
+    """
+    Takes in the separate chaining HashMap class, a snapshot path and the
+    hash function (None to use the one named in the snapshot)
+    Returns a HashMap with every chain rebuilt in its saved order
+    The values are unpickled, so path must be a trusted file
+    """
+    snapshot = _Snapshot(_read(path), path)
+    if snapshot.kind != KIND_SEPARATE_CHAINING:
+        raise ValueError(f"{path} is not a separate chaining snapshot")
+
+    map = cls(1, snapshot.hash_function(function, mixed=False),
+              capacity_policy=('power_of_two' if snapshot.power_of_two
+                               else 'prime'))
+    capacity = snapshot.capacity
+    buckets = map._new_buckets(capacity)
+    clock_offset = _clock_offset(map)
+
+    for index in range(capacity):
+        offset, length = SC_BUCKET.unpack_from(
+            snapshot.buffer, snapshot.table_start + index * SC_BUCKET.size)
+        if length == 0:
+            continue
+
+        entries = []
+        for _ in range(length):
+            _, start, key_length, value_length = snapshot.node(offset)
+            entries.append(snapshot.entry(offset)
+                           + (snapshot.expiry(offset),))
+            offset = start + key_length + value_length
+
+        # Inserting at the head, so the chain is rebuilt back to front
+        bucket = LinkedList()
+        for key, value, hash, expiry in reversed(entries):
+            _restore_expiry(map, bucket.insert(key, value, hash), expiry,
+                            clock_offset)
+
+        # Long chains go back to being searched by bisection
+        if (map._treeify_threshold is not None
+                and length > map._treeify_threshold):
+            bucket = SortedBucket(bucket)
+        buckets[index] = bucket
+
+    map._buckets = buckets
+    map._capacity = capacity
+    map._size = snapshot.size
+    return map
+
+
+class SnapshotView:
+    """
+    Read-only map over a snapshot file of either kind
+    The file is memory-mapped and only the slots a lookup probes are read,
+    so opening a view costs the same however many entries it holds
+    Keys whose ttl has run out since the snapshot was saved read as absent
+    get unpickles the value it finds, so only open trusted files
+    """
+
+    def __init__(self, path: str, function=None) -> None:
+        """
+        Takes in a snapshot path and the hash function (None to use the
+        one named in the snapshot)
+        """
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._snapshot = _Snapshot(self._mmap, path)
+        self._hash_function = self._snapshot.hash_function(function)
+
+        # Probe j is at offset (j*j + j) / 2 in a power-of-two table
+        self._triangular = int(self._snapshot.power_of_two)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._snapshot.size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._snapshot.capacity
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        offset = self._find(key)
+        if offset == -1 or self._expired(offset):
+            return None
+        return self._snapshot.entry(offset)[1]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        offset = self._find(key)
+        return offset != -1 and not self._expired(offset)
+
+    def _expired(self, offset: int) -> bool:
+        """
+        Returns True if the key of the node at offset has expired
+        """
+        return self._snapshot.expiry(offset) <= time.time()
+
+    def _matches(self, offset: int, hash: int, key_bytes: bytes) -> bool:
+        """
+        Returns True if the node at offset holds the key
+        """
+        node_hash, start, key_length, _ = self._snapshot.node(offset)
+        return (node_hash == hash and key_length == len(key_bytes)
+                and self._mmap[start:start + key_length] == key_bytes)
+
+    def _find(self, key: str) -> int:
+        """
+        Takes in a key
+        Returns
+            Offset - Where the key's node starts
+            -1 - Key doesn't exist
+        """
+        snapshot = self._snapshot
+        hash = self._hash_function(key)
+        key_bytes = key.encode('utf-8')
+        capacity = snapshot.capacity
+
+        if snapshot.kind == KIND_SEPARATE_CHAINING:
+            offset, length = SC_BUCKET.unpack_from(
+                self._mmap,
+                snapshot.table_start + (hash % capacity) * SC_BUCKET.size)
+            for _ in range(length):
+                if self._matches(offset, hash, key_bytes):
+                    return offset
+                _, start, key_length, value_length = snapshot.node(offset)
+                offset = start + key_length + value_length
+            return -1
+
+        home = hash % capacity
+        hash_index = home
+        j = 1
+
+        while j <= capacity:
+            state, offset = OA_SLOT.unpack_from(
+                self._mmap, snapshot.table_start + hash_index * OA_SLOT.size)
+            if state == SLOT_EMPTY:
+                return -1
+
+            if state == SLOT_LIVE:
+                if self._matches(offset, hash, key_bytes):
+                    return offset
+
+                # A Robin Hood key would have displaced an entry that is
+                # closer to its own home than the key is to its home
+                if snapshot.robin_hood:
+                    node_hash = snapshot.node(offset)[0]
+                    if (hash_index - node_hash) % capacity < j - 1:
+                        return -1
+
+            if snapshot.robin_hood:
+                hash_index = (hash_index + 1) % capacity
+            else:
+                hash_index = ((home + ((j*j + self._triangular*j)
+                                       >> self._triangular))
+                              % capacity)
+            j += 1
+
+        return -1
+
+    def close(self) -> None:
+        """
+        Unmaps the file
+        """
+        self._mmap.close()
+
+    def __enter__(self) -> "SnapshotView":
+        """Use as a context manager that unmaps the file on exit"""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Unmaps the file"""
+        self.close()
@@ -0,0 +1,490 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Open addressing hash map in the style of a Swiss table. Next
+# to the parallel hash/key/value arrays it keeps one control byte per slot:
+# EMPTY, DELETED, or the low 7 bits of the slot's hash (its fingerprint).
+# Slots are probed a group of GROUP_WIDTH at a time, and a group is searched
+# for the key's fingerprint in the control bytes alone, so keys are only
+# compared in slots whose fingerprint matches. A group holding an EMPTY slot
+# ends the probe, which is how most misses finish without comparing a key.
+#
+# The capacity is a power of two and the hashes are mixed (mixed_hash); the
+# high bits pick the first group and groups are probed triangularly, which
+# visits every group of a power-of-two table. get_many and contains_many
+# match the fingerprints of all their keys' first groups in one NumPy
+# comparison when NumPy is installed.
+
+from array import array
+
+from hash_functions import MASK64, mixed_hash, resolve_hash_function
+from hashmap_helper import (DynamicArray, HashEntry, batch_hash,
+                            hash_function_1, hash_function_2, np,
+                            power_of_two_at_least)
+
+GROUP_WIDTH = 16
+
+# Control bytes of slots without a live key. A live slot holds its
+# fingerprint, hash & FINGERPRINT_MASK, which never has the high bit set
+EMPTY = 0x80
+DELETED = 0xFE
+FINGERPRINT_MASK = 0x7F
+
+# Largest fraction of the slots that may be live or DELETED
+MAX_LOAD = 7 / 8
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that probes groups of GROUP_WIDTH slots
+        using their control bytes, with at least capacity slots
+        function may be a hash function or its name in HASH_FUNCTIONS
+        """
+        self._capacity = self._table_capacity(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = mixed_hash(resolve_hash_function(function))
+        self._size = 0
+        self._tombstones = 0
+
+        # Bumped whenever entries are added, removed or moved, so the
+        # iterators can tell the map changed under them
+        self._version = 0
+
+    @staticmethod
+    def _table_capacity(capacity: int) -> int:
+        """
+        Returns the power of two at or above capacity, at least one group
+        """
+        return power_of_two_at_least(max(capacity, GROUP_WIDTH))
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the storage with empty arrays of the given capacity
+        """
+        self._control = bytearray([EMPTY]) * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._group_mask = capacity // GROUP_WIDTH - 1
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry_at(i)) + '\n'
+        return out
+
+    def _entry_at(self, index: int) -> HashEntry:
+        """
+        Returns a HashEntry view of the slot at index, or None if empty
+        """
+        if self._control[index] == EMPTY:
+            return None
+        entry = HashEntry(self._keys[index], self._values[index],
+                          self._hashes[index])
+        entry.is_tombstone = self._control[index] == DELETED
+        return entry
+
+    def _hash(self, key: str) -> int:
+        """
+        Returns the key's mixed hash reduced to unsigned 64 bits
+        """
+        return self._hash_function(key) & MASK64
+
+    def _hash_batch(self, keys: list) -> list:
+        """
+        Returns the reduced hashes of every key, hashed in one batch
+        """
+        return [hash & MASK64
+                for hash in batch_hash(self._hash_function, keys)]
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns a float representing the table load factor
+        """
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets
+        DELETED slots are not counted as empty since they still occupy a
+        slot
+        """
+        return self._capacity - self._size - self._tombstones
+
+    # ------------------------------------------------------------------ #
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Takes in a key and its hash
+        Returns
+            Index - Slot holding the live entry for the key
+            -1 - Key doesn't exist
+        Keys are only compared in slots whose fingerprint matches
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        fingerprint = hash & FINGERPRINT_MASK
+        group = (hash >> 7) & self._group_mask
+
+        for step in range(self._group_mask + 1):
+            start = group * GROUP_WIDTH
+            end = start + GROUP_WIDTH
+
+            index = control.find(fingerprint, start, end)
+            while index != -1:
+                if hashes[index] == hash and keys[index] == key:
+                    return index
+                index = control.find(fingerprint, index + 1, end)
+
+            # The key would have been placed in this group's free slot
+            if control.find(EMPTY, start, end) != -1:
+                return -1
+
+            # Triangular probe over the groups
+            group = (group + step + 1) & self._group_mask
+        return -1
+
+    def _free_index(self, hash: int) -> int:
+        """
+        Returns the first EMPTY or DELETED slot in the hash's probe
+        sequence; the load limit guarantees there is one
+        """
+        control = self._control
+        group = (hash >> 7) & self._group_mask
+        step = 0
+
+        while True:
+            start = group * GROUP_WIDTH
+            for index in range(start, start + GROUP_WIDTH):
+                if control[index] & EMPTY:
+                    return index
+
+            step += 1
+            group = (group + step) & self._group_mask
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Takes in a key and a value and places it in the hash map
+        """
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places the key and value in the hash map given the key's
+        precomputed hash
+        """
+        index = self._find_index(key, hash)
+        if index != -1:
+            self._values[index] = value
+            return
+
+        # Grows the table, or only reclaims DELETED slots if they are what
+        # fills it
+        if self._size + self._tombstones + 1 > self._capacity * MAX_LOAD:
+            if self._size + 1 > self._capacity * MAX_LOAD / 2:
+                self._rehash(self._capacity * 2)
+            else:
+                self._rehash(self._capacity)
+
+        index = self._free_index(hash)
+        if self._control[index] == DELETED:
+            self._tombstones -= 1
+
+        self._control[index] = hash & FINGERPRINT_MASK
+        self._hashes[index] = hash
+        self._keys[index] = key
+        self._values[index] = value
+        self._size += 1
+        self._version += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Takes in a new_capacity (as an integer) and resizes the table
+        The capacity is rounded up to a power of two that keeps the load
+        within MAX_LOAD
+        """
+        if new_capacity < self._size:
+            return
+
+        capacity = self._table_capacity(new_capacity)
+        while self._size > capacity * MAX_LOAD:
+            capacity *= 2
+        self._rehash(capacity)
+
+    def _reserve(self, expected_size: int) -> None:
+        """
+        Grows the table once, up front, so that expected_size entries fit
+        without put triggering any further resizes
+        """
+        new_capacity = self._capacity
+        while expected_size > new_capacity * MAX_LOAD:
+            new_capacity *= 2
+
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live slot into fresh arrays of new_capacity using the
+        stored hashes, so the hash function is never called
+        """
+        old_control, old_hashes = self._control, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._version += 1
+
+        for num in range(len(old_control)):
+            if old_control[num] & EMPTY:
+                continue
+
+            hash = old_hashes[num]
+            index = self._free_index(hash)
+            self._control[index] = old_control[num]
+            self._hashes[index] = hash
+            self._keys[index] = old_keys[num]
+            self._values[index] = old_values[num]
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        index = self._find_index(key, self._hash(key))
+        if index == -1:
+            return
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        return self._find_index(key, self._hash(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Takes in a key and removes it from the hash map if it exists
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Removes the key given its precomputed hash, if it exists
+        """
+        index = self._find_index(key, hash)
+        if index == -1:
+            return
+
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._version += 1
+
+        # A group that still has an EMPTY slot has never been full, so no
+        # probe ever went past it and the slot can simply be emptied
+        start = index - index % GROUP_WIDTH
+        if self._control.find(EMPTY, start, start + GROUP_WIDTH) != -1:
+            self._control[index] = EMPTY
+        else:
+            self._control[index] = DELETED
+            self._tombstones += 1
+
+    # ------------------------------------------------------------------ #
+
+    def _find_indexes(self, keys: list, hashes: list) -> list:
+        """
+        Takes in keys and their hashes
+        Returns
+            List - _find_index of every key
+        With NumPy the first group of every key is matched against its
+        fingerprint in one comparison, and a key whose group has no match
+        but an EMPTY slot is a miss without any further work
+        """
+        if np is None or not keys:
+            return [self._find_index(keys[num], hashes[num])
+                    for num in range(len(keys))]
+
+        hash_array = np.array(hashes, dtype=np.uint64)
+        fingerprints = (hash_array & FINGERPRINT_MASK).astype(np.uint8)
+        groups = (hash_array >> 7) & np.uint64(self._group_mask)
+
+        # One row of GROUP_WIDTH control bytes per key
+        slots = (groups.astype(np.intp)[:, None] * GROUP_WIDTH
+                 + np.arange(GROUP_WIDTH, dtype=np.intp))
+        control = np.frombuffer(self._control, dtype=np.uint8)[slots]
+        matches = control == fingerprints[:, None]
+        has_empty = (control == EMPTY).any(axis=1)
+
+        result = [-1] * len(keys)
+        unresolved = ~has_empty
+        for num in np.flatnonzero(matches.any(axis=1)).tolist():
+            key, hash = keys[num], hashes[num]
+            for index in slots[num][matches[num]].tolist():
+                if self._hashes[index] == hash and self._keys[index] == key:
+                    result[num] = index
+                    unresolved[num] = False
+                    break
+
+        # Keys whose first group is full probe the following groups
+        for num in np.flatnonzero(unresolved).tolist():
+            result[num] = self._find_index(keys[num], hashes[num])
+        return result
+
+    def put_many(self, items) -> None:
+        """
+        Takes in an iterable of (key, value) pairs and places them all in
+        the hash map
+        Keys are hashed in one batch and the table is grown at most once
+        """
+        items = list(items)
+        if not items:
+            return
+
+        hashes = self._hash_batch([key for key, _ in items])
+        self._reserve(self._size + len(items))
+
+        for num in range(len(items)):
+            key, value = items[num]
+            self._put_hashed(key, value, hashes[num])
+
+    def get_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - Value for each key in input order, None where the key
+            doesn't exist
+        """
+        keys = list(keys)
+        indexes = self._find_indexes(keys, self._hash_batch(keys))
+        return [None if index == -1 else self._values[index]
+                for index in indexes]
+
+    def contains_many(self, keys) -> list:
+        """
+        Takes in an iterable of keys
+        Returns
+            List - True/False for each key in input order
+        """
+        keys = list(keys)
+        indexes = self._find_indexes(keys, self._hash_batch(keys))
+        return [index != -1 for index in indexes]
+
+    def remove_many(self, keys) -> None:
+        """
+        Takes in an iterable of keys and removes each one that exists
+        """
+        keys = list(keys)
+        hashes = self._hash_batch(keys)
+        for num in range(len(keys)):
+            self._remove_hashed(keys[num], hashes[num])
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray of tuples containing (keys, values)
+        """
+        new_da = DynamicArray()
+        for tup in self.items():
+            new_da.append(tup)
+        return new_da
+
+    def _live_indexes(self):
+        """
+        Yields the index of every live slot in slot order
+        Raises RuntimeError if the map is changed in between
+        """
+        version = self._version
+        for index in range(self._capacity):
+            if self._control[index] & EMPTY:
+                continue
+            yield index
+            if self._version != version:
+                raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Returns a new iterator over the keys, which reads the table as it
+        goes instead of copying it
+        """
+        return (self._keys[index] for index in self._live_indexes())
+
+    def values(self):
+        """
+        Returns a new iterator over the values
+        """
+        return (self._values[index] for index in self._live_indexes())
+
+    def items(self):
+        """
+        Returns a new iterator over the (key, value) tuples
+        """
+        return ((self._keys[index], self._values[index])
+                for index in self._live_indexes())
+
+    def clear(self) -> None:
+        """
+        Empties every slot in the hash map
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+        self._version += 1
+
+    def __iter__(self):
+        """
+        Returns a new iterator over the live entries (as HashEntry
+        objects), so nested loops over the same map don't interfere
+        """
+        return (self._entry_at(index) for index in self._live_indexes())
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(),
+                  m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(),
+                  m.get_capacity())
+
+    print("\nPDF - get_many example")
+    print("----------------------")
+    m = HashMap(31, hash_function_1)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    print(m.get_many(['key1', 'key49', 'key50']))
+    m.remove('key1')
+    print(m.contains_many(['key1', 'key2']), m.get_size())
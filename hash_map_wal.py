@@ -0,0 +1,396 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Write-ahead log that makes either hash map durable. Every put,
+# remove and clear is appended to a log before it is applied to the map, and
+# a background thread writes the log out and fsyncs it in groups, so a write
+# only waits for the disk when the caller asks it to (sync/flush).
+#
+#     <path>.snap   snapshot of the map (hash_map_snapshot), if compacted
+#     <path>.wal    log records applied on top of the snapshot
+#
+# Each record is a CRC-32 of the rest of it, RECORD (operation, key
+# length, value length), then the UTF-8 key and the pickled value. Opening
+# the map loads the snapshot and replays the log; a torn record at the end
+# of the log, left by a crash mid-write, is cut off. Once the log holds
+# more records than the map holds keys it is compacted: the map is saved as
+# the new snapshot and the log starts over. Replaying an old log on top of
+# a newer snapshot gives the same map, so a crash between the two steps is
+# safe.
+#
+# Like the snapshot, the log stores values with pickle, which can run
+# arbitrary code when it is loaded: only open paths nobody untrusted can
+# write to.
+
+import asyncio
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from hash_map_sc import HashMap
+from hashmap_helper import DynamicArray, hash_function_1
+
+CRC = struct.Struct('<I')
+
+# operation, key length, value length
+RECORD = struct.Struct('<BII')
+
+OP_PUT = 1
+OP_REMOVE = 2
+OP_CLEAR = 3
+
+
+def _pack_record(operation: int, key: str = '', value: bytes = b'') -> bytes:
+    """
+    Returns the log record of one mutation
+    """
+    key_bytes = key.encode('utf-8')
+    body = (RECORD.pack(operation, len(key_bytes), len(value))
+            + key_bytes + value)
+    return CRC.pack(zlib.crc32(body)) + body
+
+
+def _read_records(data: bytes):
+    """
+    Takes in the contents of a log
+    Yields (operation, key, value bytes, end offset) for each whole record,
+    stopping at the first torn or corrupt one
+    """
+    offset = 0
+    while offset + CRC.size + RECORD.size <= len(data):
+        crc, = CRC.unpack_from(data, offset)
+        start = offset + CRC.size
+        operation, key_length, value_length = RECORD.unpack_from(data, start)
+        end = start + RECORD.size + key_length + value_length
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            return
+        start += RECORD.size
+        key = data[start:start + key_length].decode('utf-8')
+        yield operation, key, data[start + key_length:end], end
+        offset = end
+
+
+class DurableHashMap:
+    def __init__(self, path: str, map_class=HashMap, capacity: int = 11,
+                 function=None, interval: float = 0.01,
+                 group_bytes: int = 1 << 16,
+                 min_compact_bytes: int = 1 << 20) -> None:
+        """
+        Opens the durable map stored at path, creating it if it doesn't
+        exist yet (the files there are unpickled, so they must be trusted)
+        map_class is the HashMap class of either hash_map_sc or
+        hash_map_oa, built with capacity and function (hash_function_1 if
+        None). Reopening a compacted map uses the hash function saved in
+        its snapshot when function is None, and raises ValueError if a
+        different one is passed in
+        The log is fsynced at most every interval seconds, or as soon as
+        group_bytes of records are waiting
+        The log is compacted once it is at least min_compact_bytes long
+        and holds more records than the map holds keys
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if group_bytes < 1:
+            raise ValueError("group_bytes must be at least 1")
+
+        self._path = path
+        self._interval = interval
+        self._group_bytes = group_bytes
+        self._min_compact_bytes = min_compact_bytes
+
+        if os.path.exists(self._snapshot_path()):
+            self._map = map_class.load(self._snapshot_path(), function)
+        else:
+            if function is None:
+                function = hash_function_1
+            self._map = map_class(capacity, function)
+        self._replay()
+        self._log = open(self._log_path(), 'ab')
+
+        # Records not yet written to the log, and the sequence numbers of
+        # the last record queued and the last one known to be on disk
+        self._pending = bytearray()
+        self._sequence = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+
+        # _condition guards the fields above, _io_lock the log file itself
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop,
+                                        name='wal-writer', daemon=True)
+        self._writer.start()
+
+    def _snapshot_path(self) -> str:
+        """Returns the path of the snapshot file"""
+        return self._path + '.snap'
+
+    def _log_path(self) -> str:
+        """Returns the path of the log file"""
+        return self._path + '.wal'
+
+    def _replay(self) -> None:
+        """
+        Applies the records in the log to the map, then cuts off anything
+        after the last whole record
+        """
+        self._log_bytes = 0
+        self._log_records = 0
+        if not os.path.exists(self._log_path()):
+            return
+
+        with open(self._log_path(), 'rb') as file:
+            data = file.read()
+
+        for operation, key, value, end in _read_records(data):
+            self._apply(operation, key, value)
+            self._log_bytes = end
+            self._log_records += 1
+
+        if self._log_bytes < len(data):
+            with open(self._log_path(), 'r+b') as file:
+                file.truncate(self._log_bytes)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _apply(self, operation: int, key: str, value: bytes) -> None:
+        """
+        Applies one logged mutation to the map
+        """
+        if operation == OP_PUT:
+            self._map.put(key, pickle.loads(value))
+        elif operation == OP_REMOVE:
+            self._map.remove(key)
+        elif operation == OP_CLEAR:
+            self._map.clear()
+        else:
+            raise ValueError(f"unknown log operation {operation}")
+
+    # ------------------------------------------------------------------ #
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get(self, key: str) -> object:
+        """
+        Takes in a key
+        Returns
+            Value - At the key
+            None - Key doesn't exist
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Takes in a key
+        Returns
+            True - Key exists
+            False - Key doesn't exist
+        """
+        return self._map.contains_key(key)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array of the key/value tuples in the map
+        """
+        return self._map.get_keys_and_values()
+
+    def put(self, key: str, value: object) -> int:
+        """
+        Takes in a key and a value, logs the put and places it in the map
+        Returns
+            Int - The put's sequence number, durable once sync/flush for it
+            returns
+        """
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        sequence = self._append(_pack_record(OP_PUT, key, value_bytes))
+        self._map.put(key, value)
+        self._compact_if_needed()
+        return sequence
+
+    def remove(self, key: str) -> int:
+        """
+        Takes in a key, logs the removal and removes it if it exists
+        Returns
+            Int - The removal's sequence number
+        """
+        if not self._map.contains_key(key):
+            return self._sequence
+        sequence = self._append(_pack_record(OP_REMOVE, key))
+        self._map.remove(key)
+        self._compact_if_needed()
+        return sequence
+
+    def clear(self) -> int:
+        """
+        Logs the clear and removes every key
+        Returns
+            Int - The clear's sequence number
+        """
+        sequence = self._append(_pack_record(OP_CLEAR))
+        self._map.clear()
+        self._compact_if_needed()
+        return sequence
+
+    # ------------------------------------------------------------------ #
+
+    def _append(self, record: bytes) -> int:
+        """
+        Queues a record for the writer thread
+        Returns
+            Int - The record's sequence number
+        """
+        with self._condition:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise ValueError("the map is closed")
+
+            # The writer starts its interval when the first record arrives
+            # and cuts it short once group_bytes are waiting
+            if not self._pending or len(self._pending) + len(record) >= \
+                    self._group_bytes:
+                self._condition.notify_all()
+            self._pending += record
+            self._sequence += 1
+            self._log_bytes += len(record)
+            self._log_records += 1
+            return self._sequence
+
+    def _write_loop(self) -> None:
+        """
+        Runs on the writer thread: waits for records, gives more of them
+        the interval to arrive, then writes and fsyncs them in one go
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._pending:
+                    return
+
+                deadline = time.monotonic() + self._interval
+                while (not self._closed
+                       and len(self._pending) < self._group_bytes):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+            try:
+                self._write_pending()
+            except OSError as error:
+                with self._condition:
+                    self._error = error
+                    self._condition.notify_all()
+                return
+
+    def _write_pending(self) -> None:
+        """
+        Writes the queued records to the log and fsyncs it, then wakes
+        everyone waiting for them
+        """
+        with self._io_lock:
+            with self._condition:
+                data = self._pending
+                sequence = self._sequence
+                self._pending = bytearray()
+
+            if data:
+                self._log.write(data)
+                self._log.flush()
+                os.fsync(self._log.fileno())
+
+            with self._condition:
+                self._durable = max(self._durable, sequence)
+                self._condition.notify_all()
+
+    def sync(self) -> None:
+        """
+        Blocks until every mutation made so far is on disk
+        """
+        with self._condition:
+            if self._error is not None:
+                raise self._error
+            if self._durable >= self._sequence:
+                return
+        self._write_pending()
+
+    async def flush(self) -> None:
+        """
+        Waits, without blocking the event loop, until every mutation made
+        so far is on disk
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.sync)
+
+    # ------------------------------------------------------------------ #
+
+    def _compact_if_needed(self) -> None:
+        """
+        Compacts the log once it is long enough and holds more records
+        than the map holds keys
+        """
+        if (self._log_bytes >= self._min_compact_bytes
+                and self._log_records > self._map.get_size()):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Saves the map as the new snapshot and starts an empty log
+        """
+        with self._io_lock:
+            # Writes out what is queued first so the old log is complete
+            # up to the snapshot
+            with self._condition:
+                data = self._pending
+                sequence = self._sequence
+                self._pending = bytearray()
+            self._log.write(data)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+
+            self._map.save(self._snapshot_path())
+
+            # The empty log is renamed into place, so a crash leaves either
+            # the old log (replayed harmlessly) or the new one
+            temporary = self._log_path() + '.tmp'
+            with open(temporary, 'wb') as file:
+                os.fsync(file.fileno())
+            os.replace(temporary, self._log_path())
+            self._log.close()
+            self._log = open(self._log_path(), 'ab')
+
+            with self._condition:
+                self._log_bytes = 0
+                self._log_records = 0
+                self._durable = max(self._durable, sequence)
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Writes out and fsyncs the log, then stops the writer thread
+        """
+        if self._closed:
+            return
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        try:
+            self.sync()
+        finally:
+            self._log.close()
+
+    def __enter__(self) -> "DurableHashMap":
+        """Returns the map for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Closes the map at the end of a with statement"""
+        self.close()
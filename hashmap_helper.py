@@ -5,6 +5,13 @@
 #              are available and how they're implemented.
 #              Don't modify the contents of this file.
 
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:     # NumPy is optional, batch hashing falls back to lists
+    np = None
+
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
@@ -96,6 +103,134 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+def _code_point_matrix(keys) -> "np.ndarray":
+    """
+    Encode string keys into a (len(keys), longest key) uint32 matrix of
+    code points, padded with zeros. Padding contributes nothing to either
+    sample hash, so row sums match the scalar functions exactly.
+    """
+    encoded = np.asarray(keys, dtype=str)
+    width = encoded.dtype.itemsize // 4
+    return encoded.view(np.uint32).reshape(len(encoded), width)
+
+
+def hash_function_1_batch(keys):
+    """
+    Vectorized hash_function_1 over a sequence of keys.
+    Returns a NumPy int64 array (a list if NumPy is not installed).
+    """
+    keys = list(keys)
+    if np is None:
+        return [hash_function_1(key) for key in keys]
+    return _code_point_matrix(keys).sum(axis=1, dtype=np.int64)
+
+
+def hash_function_2_batch(keys):
+    """
+    Vectorized hash_function_2 over a sequence of keys.
+    Returns a NumPy int64 array (a list if NumPy is not installed).
+    """
+    keys = list(keys)
+    if np is None:
+        return [hash_function_2(key) for key in keys]
+    matrix = _code_point_matrix(keys)
+    weights = np.arange(1, matrix.shape[1] + 1, dtype=np.int64)
+    return matrix.astype(np.int64) @ weights
+
+
+# Scalar hash function -> batch variant producing identical hash codes
+BATCH_HASH_FUNCTIONS = {
+    hash_function_1: hash_function_1_batch,
+    hash_function_2: hash_function_2_batch,
+}
+
+
+def batch_hash(function, keys) -> list:
+    """
+    Hash every key with function, using its registered batch variant
+    when there is one.
+    Returns a list of Python ints in the same order as keys.
+    """
+    batch_function = BATCH_HASH_FUNCTIONS.get(function)
+    if batch_function is None:
+        return [function(key) for key in keys]
+
+    hashes = batch_function(keys)
+    if np is not None and isinstance(hashes, np.ndarray):
+        return hashes.tolist()
+    return hashes
+
+
+# ------------ Table capacities for both HashMaps  ------------- #
+
+CAPACITY_POLICIES = ('prime', 'power_of_two')
+
+# Primes below this are looked up in a sieve, larger ones trial divided
+PRIME_SIEVE_LIMIT = 1 << 23
+
+# _odd_sieve[i] is 1 when 2*i + 1 is prime, built on first use
+_odd_sieve = None
+
+
+def _prime_sieve() -> bytearray:
+    """Return the odd-number sieve of Eratosthenes, building it once."""
+    global _odd_sieve
+    if _odd_sieve is None:
+        size = PRIME_SIEVE_LIMIT // 2
+        sieve = bytearray([1]) * size
+        sieve[0] = 0
+        i = 1
+        while (2 * i + 1) ** 2 < PRIME_SIEVE_LIMIT:
+            if sieve[i]:
+                prime = 2 * i + 1
+                start = prime * prime // 2
+                sieve[start::prime] = bytes(len(range(start, size, prime)))
+            i += 1
+        _odd_sieve = sieve
+    return _odd_sieve
+
+
+def _trial_division(number: int) -> bool:
+    """Return True if number is prime, checking odd factors one by one."""
+    if number < 2 or number % 2 == 0:
+        return number == 2
+    factor = 3
+    while factor * factor <= number:
+        if number % factor == 0:
+            return False
+        factor += 2
+    return True
+
+
+def is_prime(number: int) -> bool:
+    """Return True if number is prime."""
+    if number < 2 or number % 2 == 0:
+        return number == 2
+    if number < PRIME_SIEVE_LIMIT:
+        return _prime_sieve()[number // 2] == 1
+    return _trial_division(number)
+
+
+def prime_at_least(number: int) -> int:
+    """Return the smallest prime that is >= number."""
+    if number <= 2:
+        return 2
+    if number < PRIME_SIEVE_LIMIT:
+        index = _prime_sieve().find(1, number // 2)
+        if index != -1:
+            return 2 * index + 1
+
+    candidate = max(number, PRIME_SIEVE_LIMIT) | 1
+    while not _trial_division(candidate):
+        candidate += 2
+    return candidate
+
+
+def power_of_two_at_least(number: int) -> int:
+    """Return the smallest power of two that is >= number (at least 1)."""
+    return 1 << max(number - 1, 0).bit_length()
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +238,19 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        hash caches the full hash code of the key so it is never recomputed.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
+
+        # Clock time the key expires at, None if it never does
+        self.expires = None
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -168,20 +311,22 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node at front of the list and return it."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
+        return self._head
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash is given, cached hashes are compared before keys.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -192,32 +337,222 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash is given, cached hashes are compared before keys.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
 
+    def move_to_front(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        A matching node is moved to the head of the list.
+        """
+        previous, node = None, self._head
+        while node:
+            if (hash is None or node.hash == hash) and node.key == key:
+                if previous:
+                    previous.next = node.next
+                    node.next = self._head
+                    self._head = node
+                return node
+            previous, node = node, node.next
+        return None
+
+    def transpose(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        A matching node is swapped with the node in front of it.
+        """
+        before, previous, node = None, None, self._head
+        while node:
+            if (hash is None or node.hash == hash) and node.key == key:
+                if previous:
+                    previous.next = node.next
+                    node.next = previous
+                    if before:
+                        before.next = node
+                    else:
+                        self._head = node
+                return node
+            before, previous, node = previous, node, node.next
+        return None
+
     def length(self) -> int:
         """Return the length of the list."""
         return self._size
 
 
+class SortedBucket:
+    """
+    Bucket that keeps its nodes in an array sorted by (hash, key), so a
+    lookup is a binary search instead of a scan
+    Supported methods are the same as LinkedList's, but every key must come
+    with its hash
+    """
+
+    def __init__(self, nodes=()) -> None:
+        """
+        Initialize the bucket with the given nodes (SLNodes whose hash is
+        set); their next links are not used
+        """
+        nodes = sorted(nodes, key=lambda node: (node.hash, node.key))
+        self._order = [(node.hash, node.key) for node in nodes]
+        self._nodes = nodes
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SORTED [' + ' -> '.join(str(node) for node in
+                                        self._nodes) + ']'
+
+    def __iter__(self):
+        """Return an iterator over the nodes in (hash, key) order."""
+        return iter(self._nodes)
+
+    def _index(self, key: str, hash: int) -> int:
+        """Return the index of the node with matching key, or -1."""
+        index = bisect_left(self._order, (hash, key))
+        if index < len(self._order) and self._order[index] == (hash, key):
+            return index
+        return -1
+
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node at its sorted position and return it."""
+        node = SLNode(key, value, None, hash)
+        index = bisect_left(self._order, (hash, key))
+        self._order.insert(index, (hash, key))
+        self._nodes.insert(index, node)
+        return node
+
+    def remove(self, key: str, hash: int = None) -> bool:
+        """
+        Remove the node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        index = self._index(key, hash)
+        if index == -1:
+            return False
+        del self._order[index]
+        del self._nodes[index]
+        return True
+
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """Return node with matching key, or None if no match."""
+        index = self._index(key, hash)
+        if index == -1:
+            return None
+        return self._nodes[index]
+
+    def length(self) -> int:
+        """Return the number of nodes in the bucket."""
+        return len(self._nodes)
+
+    def to_linked_list(self) -> LinkedList:
+        """Return a LinkedList holding the same nodes, in the same order."""
+        bucket = LinkedList()
+        for node in reversed(self._nodes):
+            copy = bucket.insert(node.key, node.value, node.hash)
+            copy.expires = node.expires
+        return bucket
+
+
 # ---------- For use in Open Addressing (OA) HashMap  ---------- #
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        hash caches the full hash code of the key so it is never recomputed.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
+        # Distance from the home slot, used by Robin Hood probing
+        self.probe_distance = 0
+
+        # Clock time the key expires at, None if it never does
+        self.expires = None
+
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+
+
+# ------------ Opt-in statistics for both HashMaps  ------------- #
+
+def bump_histogram(histogram: list, length: int) -> None:
+    """Add one to histogram[length], growing the list as needed."""
+    while len(histogram) <= length:
+        histogram.append(0)
+    histogram[length] += 1
+
+
+def summarize_histogram(histogram: list) -> dict:
+    """Return a histogram together with its count, mean and max."""
+    count = sum(histogram)
+    total = sum(length * times for length, times in enumerate(histogram))
+    return {
+        'histogram': list(histogram),
+        'count': count,
+        'mean': total / count if count else 0.0,
+        'max': len(histogram) - 1 if count else 0,
+    }
+
+
+class MapStats:
+    """
+    Counters collected by a HashMap created with stats=True.
+    Probe histograms are lists where histogram[n] is the number of
+    operations that examined exactly n slots.
+    """
+
+    def __init__(self) -> None:
+        """Initialize every counter to zero."""
+        self.hit_probes = []
+        self.miss_probes = []
+        self.insert_probes = []
+        self.resizes = 0
+        self.compactions = 0
+        self.rehashed_entries = 0
+        self.tombstones_created = 0
+
+    def record_hit(self, probes: int) -> None:
+        """Record a successful lookup that examined probes slots."""
+        bump_histogram(self.hit_probes, probes)
+
+    def record_miss(self, probes: int) -> None:
+        """Record a failed lookup that examined probes slots."""
+        bump_histogram(self.miss_probes, probes)
+
+    def record_insert(self, probes: int) -> None:
+        """Record a put that examined probes slots."""
+        bump_histogram(self.insert_probes, probes)
+
+    def as_dict(self, probes: bool = True) -> dict:
+        """
+        Return the counters as a plain dictionary.
+        probes=False leaves out the probe and tombstone counters, which
+        only apply to open addressing.
+        """
+        stats = {
+            'resizes': self.resizes,
+            'rehashed_entries': self.rehashed_entries,
+        }
+        if probes:
+            stats['hit_probes'] = summarize_histogram(self.hit_probes)
+            stats['miss_probes'] = summarize_histogram(self.miss_probes)
+            stats['insert_probes'] = summarize_histogram(self.insert_probes)
+            stats['compactions'] = self.compactions
+            stats['tombstones_created'] = self.tombstones_created
+        return stats
@@ -0,0 +1,456 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 : HashMap Implementation
+# Description: Frequency counting over streams too large to hold in memory,
+# for when find_mode can't be used. Every counter uses bounded memory and
+# reports how far its counts can be off:
+#
+#     SpaceSaving      top-k heavy hitters in k counters (a HashMap)
+#     CountMinSketch   approximate count of any key in a fixed-size table
+#     SpillingCounter  exact counts and mode, spilling sorted runs to disk
+#
+# SpaceSaving and CountMinSketch summaries of separate streams can be
+# merged into a summary of the combined stream.
+
+import heapq
+import json
+import math
+import os
+import tempfile
+from array import array
+
+from hash_functions import murmur_hash
+from hash_map_sc import HashMap
+from hashmap_helper import DynamicArray
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters (Metwally et al.)
+    Keeps at most k counters. A key that isn't counted takes over the
+    counter of the least frequent key and inherits its count as error, so
+    each reported count is an overestimate by at most its error, and by
+    at most total / k in the worst case. Every key occurring more than
+    total / k times is guaranteed to be reported
+    """
+
+    def __init__(self, k: int, function: callable = murmur_hash) -> None:
+        """
+        Takes in the number of counters k and the hash function of the
+        counter table
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        self._k = k
+        self._function = function
+        self._total = 0
+
+        # key -> [count, error]
+        self._counters = HashMap(k, function)
+
+        # Min-heap of (count, order, key). Entries go stale when a count
+        # changes and are skipped when popped, see _pop_min
+        self._heap = []
+        self._order = 0
+
+    def update(self, key: str, count: int = 1) -> None:
+        """
+        Takes in a key and adds count occurrences of it
+        """
+        self._total += count
+        counter = self._counters.get(key)
+
+        if counter is not None:
+            counter[0] += count
+        elif self._counters.get_size() < self._k:
+            counter = [count, 0]
+            self._counters.put(key, counter)
+        else:
+            # Replaces the least frequent key
+            minimum, old_key = self._pop_min()
+            self._counters.remove(old_key)
+            counter = [minimum + count, minimum]
+            self._counters.put(key, counter)
+
+        self._push(key, counter[0])
+
+    def consume(self, stream) -> "SpaceSaving":
+        """
+        Takes in an iterable of keys and adds one occurrence of each
+        Returns:
+            the summary itself
+        """
+        for key in stream:
+            self.update(key)
+        return self
+
+    def _push(self, key: str, count: int) -> None:
+        """
+        Records the key's new count on the heap, rebuilding the heap from
+        the counters once stale entries make up most of it
+        """
+        if len(self._heap) > 2 * self._k + 64:
+            self._heap = []
+            for counted_key, counter in self._items():
+                self._order += 1
+                self._heap.append((counter[0], self._order, counted_key))
+            heapq.heapify(self._heap)
+            return
+
+        self._order += 1
+        heapq.heappush(self._heap, (count, self._order, key))
+
+    def _items(self) -> list:
+        """
+        Returns a list of (key, [count, error]) for every counted key
+        """
+        return list(self._counters.items())
+
+    def _pop_min(self) -> tuple:
+        """
+        Returns:
+            (count, key) of the least frequent counted key, removed from
+            the heap
+        """
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+    def _minimum(self) -> int:
+        """
+        Returns:
+            the count an uncounted key could have, 0 until all k counters
+            are in use
+        """
+        if self._counters.get_size() < self._k:
+            return 0
+
+        # Drops stale entries until the smallest one is current
+        while True:
+            count, _, key = self._heap[0]
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count
+            heapq.heappop(self._heap)
+
+    def estimate(self, key: str) -> tuple:
+        """
+        Takes in a key
+        Returns:
+            (count, error) - the key's true count is between count - error
+            and count. Keys without a counter get (minimum, minimum)
+        """
+        counter = self._counters.get(key)
+        if counter is None:
+            minimum = self._minimum()
+            return minimum, minimum
+        return counter[0], counter[1]
+
+    def top(self, n: int = None) -> list:
+        """
+        Takes in how many keys to return (all k by default)
+        Returns:
+            list of (key, count, error) for the most frequent keys, highest
+            count first
+        """
+        counters = [(key, counter[0], counter[1])
+                    for key, counter in self._items()]
+        counters.sort(key=lambda counter: (-counter[1], counter[2]))
+        return counters if n is None else counters[:n]
+
+    def guaranteed_top(self, n: int) -> list:
+        """
+        Takes in how many keys are wanted
+        Returns:
+            the keys among the top n whose place is certain: their lowest
+            possible count is still above the next key's highest
+        """
+        counters = self.top()
+        result = []
+        for num in range(min(n, len(counters))):
+            key, count, error = counters[num]
+            following = counters[num + 1][1] if num + 1 < len(counters) \
+                else self._minimum()
+            if count - error < following:
+                break
+            result.append(key)
+        return result
+
+    def total(self) -> int:
+        """
+        Returns the number of occurrences added so far
+        """
+        return self._total
+
+    def error_bound(self) -> float:
+        """
+        Returns the largest amount any count can be overestimated by
+        """
+        return self._total / self._k
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Takes in another summary with the same k
+        Returns:
+            a new summary of both streams together (Agarwal et al.):
+            a key missing from one summary is assumed to have that
+            summary's minimum count there, which keeps every bound valid
+        """
+        if other._k != self._k:
+            raise ValueError("can only merge summaries with the same k")
+
+        merged = {}
+        for summary, other_summary in ((self, other), (other, self)):
+            missing = other_summary._minimum()
+            for key, count, error in summary.top():
+                if key in merged:
+                    continue
+                other_counter = other_summary._counters.get(key)
+                if other_counter is None:
+                    merged[key] = (count + missing, error + missing)
+                else:
+                    merged[key] = (count + other_counter[0],
+                                   error + other_counter[1])
+
+        result = SpaceSaving(self._k, self._function)
+        result._total = self._total + other._total
+        kept = sorted(merged.items(), key=lambda item: -item[1][0])
+        for key, (count, error) in kept[:self._k]:
+            result._counters.put(key, [count, error])
+            result._push(key, count)
+        return result
+
+
+class CountMinSketch:
+    """
+    Count-min sketch (Cormode and Muthukrishnan)
+    depth rows of width counters. Each key adds to one counter per row and
+    its estimate is the smallest of them, so estimates never undercount
+    and overcount by at most error_bound() with probability confidence()
+    """
+
+    def __init__(self, width: int, depth: int, seed: int = 0) -> None:
+        """
+        Takes in the number of counters per row, the number of rows and a
+        seed for the row hashes. Only sketches with the same width, depth
+        and seed can be merged
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+
+        self._width = width
+        self._depth = depth
+        self._seed = seed
+        self._total = 0
+        self._table = array('Q', bytes(8 * width * depth))
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float,
+                   seed: int = 0) -> "CountMinSketch":
+        """
+        Takes in the relative error epsilon and failure probability delta
+        Returns:
+            a sketch whose estimates overcount by at most epsilon * total
+            with probability at least 1 - delta
+        """
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be in (0, 1)")
+        return cls(math.ceil(math.e / epsilon),
+                   math.ceil(math.log(1 / delta)), seed)
+
+    def _indices(self, key: str) -> list:
+        """
+        Returns the flat table index of the key's counter in every row
+        The rows use h1 + row * h2 (Kirsch and Mitzenmacher), so the key
+        is hashed once however many rows there are
+        """
+        hash = murmur_hash(key, self._seed)
+        h1 = hash & 0xffffffff
+        h2 = (hash >> 32) | 1
+        return [row * self._width + (h1 + row * h2) % self._width
+                for row in range(self._depth)]
+
+    def update(self, key: str, count: int = 1) -> None:
+        """
+        Takes in a key and adds count occurrences of it
+        """
+        self._total += count
+        for index in self._indices(key):
+            self._table[index] += count
+
+    def consume(self, stream) -> "CountMinSketch":
+        """
+        Takes in an iterable of keys and adds one occurrence of each
+        Returns:
+            the sketch itself
+        """
+        for key in stream:
+            self.update(key)
+        return self
+
+    def estimate(self, key: str) -> int:
+        """
+        Takes in a key
+        Returns:
+            an upper estimate of how many times the key occurred
+        """
+        return min(self._table[index] for index in self._indices(key))
+
+    def total(self) -> int:
+        """
+        Returns the number of occurrences added so far
+        """
+        return self._total
+
+    def error_bound(self) -> float:
+        """
+        Returns the largest amount an estimate overcounts by, with
+        probability confidence()
+        """
+        return math.e / self._width * self._total
+
+    def confidence(self) -> float:
+        """
+        Returns the probability that an estimate is within error_bound()
+        """
+        return 1 - math.exp(-self._depth)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """
+        Takes in a sketch with the same width, depth and seed
+        Returns:
+            a new sketch of both streams together
+        """
+        if (self._width, self._depth, self._seed) != \
+                (other._width, other._depth, other._seed):
+            raise ValueError(
+                "can only merge sketches with the same width, depth and seed")
+
+        result = CountMinSketch(self._width, self._depth, self._seed)
+        result._total = self._total + other._total
+        result._table = array('Q', (mine + theirs for mine, theirs
+                                    in zip(self._table, other._table)))
+        return result
+
+
+class SpillingCounter:
+    """
+    Exact frequency counter for streams with more distinct keys than fit
+    in memory
+    Counts up to max_keys keys in a HashMap, then writes them to a run
+    file sorted by key and starts over. Reading the counts back merges
+    the runs, so memory stays bounded by max_keys plus one key per run
+    """
+
+    def __init__(self, max_keys: int = 1000000, directory: str = None,
+                 function: callable = murmur_hash) -> None:
+        """
+        Takes in the number of keys to count in memory, the directory the
+        run files go in (a new temporary directory by default) and the
+        hash function of the in-memory map
+        """
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+
+        self._max_keys = max_keys
+        self._function = function
+        self._counts = HashMap(function=function)
+        self._directory = tempfile.TemporaryDirectory(dir=directory)
+        self._runs = []
+
+    def update(self, key: str, count: int = 1) -> None:
+        """
+        Takes in a key and adds count occurrences of it
+        """
+        if (self._counts.get_size() >= self._max_keys
+                and not self._counts.contains_key(key)):
+            self._spill()
+        self._counts.increment(key, count)
+
+    def consume(self, stream) -> "SpillingCounter":
+        """
+        Takes in an iterable of keys and adds one occurrence of each
+        Returns:
+            the counter itself
+        """
+        for key in stream:
+            self.update(key)
+        return self
+
+    def _sorted_counts(self) -> list:
+        """
+        Returns the in-memory (key, count) pairs sorted by key
+        """
+        return sorted(self._counts.items())
+
+    def _spill(self) -> None:
+        """
+        Writes the in-memory counts to a new run file and clears them
+        One line per key: the JSON-encoded key, a tab and the count
+        """
+        path = os.path.join(self._directory.name,
+                            f"run{len(self._runs)}.txt")
+        with open(path, 'w', encoding='utf-8') as file:
+            for key, count in self._sorted_counts():
+                file.write(json.dumps(key) + '\t' + str(count) + '\n')
+
+        self._runs.append(path)
+        self._counts = HashMap(function=self._function)
+
+    @staticmethod
+    def _read_run(path: str):
+        """
+        Yields the (key, count) pairs of a run file in order
+        """
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                key, count = line.rsplit('\t', 1)
+                yield json.loads(key), int(count)
+
+    def items(self):
+        """
+        Yields (key, count) for every distinct key, sorted by key
+        """
+        runs = [self._read_run(path) for path in self._runs]
+        runs.append(iter(self._sorted_counts()))
+
+        current, total = None, 0
+        for key, count in heapq.merge(*runs):
+            if key != current:
+                if current is not None:
+                    yield current, total
+                current, total = key, 0
+            total += count
+        if current is not None:
+            yield current, total
+
+    def mode(self) -> tuple[DynamicArray, int]:
+        """
+        Returns:
+            a tuple containing the most frequently occurring keys, sorted,
+            and the frequency at which they occur
+        """
+        modes, max_num = [], 0
+        for key, count in self.items():
+            if count > max_num:
+                modes, max_num = [key], count
+            elif count == max_num:
+                modes.append(key)
+        return DynamicArray(modes), max_num
+
+    def close(self) -> None:
+        """
+        Deletes the run files
+        """
+        self._directory.cleanup()
+        self._runs = []
+
+    def __enter__(self) -> "SpillingCounter":
+        """Use as a context manager that deletes the run files on exit"""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Deletes the run files"""
+        self.close()